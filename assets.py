@@ -0,0 +1,161 @@
+"""Precompiled sprite pack.
+
+Sprite sources (PNG data embedded below and flat-colour placeholders) are
+decoded once into an atlas file of raw RGBA pixels plus a JSON index with
+each sprite's frame rects.  Later launches memory-map the atlas and only
+turn a sprite's pixels into surfaces the first time that sprite is needed,
+so startup does not pay for art that the current room never shows.  The
+pack is rebuilt automatically when the sources change.
+
+Run ``python assets.py`` to rebuild the pack and print load timings.
+"""
+
+import base64
+import hashlib
+import json
+import mmap
+import os
+import time
+from io import BytesIO
+
+import pygame
+
+ASSET_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+PACK_VERSION = 1
+
+# Base64-encoded 32x32 knight sprite with two walking frames
+CHARACTER_FRAMES_B64 = [
+    "iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAAAkklEQVR4nO2VsQ3AIAwESZQ5GIKJXFAxEBWFh6FmpdCHIDBB+iL+0sLm9Jb8xqhUqr/rkDYw8z16Q0TTc08pwG7BAa7VRiJqaswsngN3AA6wvIIVu98EdwAOIF5BznkrwPBixRiby1dK6b53zjW1EEL3H/gKFAAOII5j7/0wjlNKGscKoADTEofRMwestZ8A4A5UY8UZJparjTMAAAAASUVORK5CYII=",
+    "iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAAApUlEQVR4nO2WsQ3EIAxFk9NN5IlcUDEQFYWHofYQ1OyQ1BGnxEaRfnH+HcjA07eF/raFQqF/1+49ICLHUw0zm+/9eAHeFhzgu3qQmac9EXHfA3cADrDcghW7fwnuABzA3YLW2qsAcAfgAKY/u5Qy/f+qOtUR0bSXc759A+5AAMAB3IEkpfQYSGqtEUgCwKylPDDGuKx775c1ER2qahpEtwOeCbfoBGOcIaGV2JaWAAAAAElFTkSuQmCC",
+]
+
+# Sprite name -> ("png", [base64 frames]) or ("fill", (size, color))
+SPRITES = {
+    "player": ("png", CHARACTER_FRAMES_B64),
+    "Slime": ("fill", ((32, 32), (200, 0, 0))),
+    "Bat": ("fill", ((32, 32), (0, 0, 200))),
+    "Gremlin": ("fill", ((32, 32), (0, 200, 0))),
+}
+
+
+def source_hash(sprites=SPRITES):
+    data = json.dumps([PACK_VERSION, sprites], sort_keys=True).encode()
+    return hashlib.sha1(data).hexdigest()
+
+
+def decode_frames(kind, source):
+    if kind == "png":
+        return [pygame.image.load(BytesIO(base64.b64decode(data))) for data in source]
+    size, color = source
+    surf = pygame.Surface(size, pygame.SRCALPHA)
+    surf.fill(color)
+    return [surf]
+
+
+def build_pack(cache_dir=ASSET_CACHE_DIR, sprites=SPRITES):
+    """Decode every sprite and write the atlas and its index.
+
+    Each sprite's frames sit side by side in one strip so a sprite can be
+    sliced out of the atlas as a single contiguous block of pixels.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    index = {"version": PACK_VERSION, "hash": source_hash(sprites), "sprites": {}}
+    offset = 0
+    tmp_path = os.path.join(cache_dir, "sprites.atlas.tmp")
+    with open(tmp_path, "wb") as f:
+        for name, (kind, source) in sprites.items():
+            frames = decode_frames(kind, source)
+            width = sum(frame.get_width() for frame in frames)
+            height = max(frame.get_height() for frame in frames)
+            strip = pygame.Surface((width, height), pygame.SRCALPHA)
+            rects = []
+            x = 0
+            for frame in frames:
+                strip.blit(frame, (x, 0))
+                rects.append([x, 0, frame.get_width(), frame.get_height()])
+                x += frame.get_width()
+            pixels = pygame.image.tobytes(strip, "RGBA")
+            f.write(pixels)
+            index["sprites"][name] = {
+                "offset": offset,
+                "size": [width, height],
+                "frames": rects,
+            }
+            offset += len(pixels)
+    os.replace(tmp_path, os.path.join(cache_dir, "sprites.atlas"))
+    with open(os.path.join(cache_dir, "sprites.json"), "w") as f:
+        json.dump(index, f)
+    return index
+
+
+class AssetPack:
+    """Memory-mapped sprite atlas with lazily created frame surfaces."""
+
+    def __init__(self, index, atlas_path):
+        self.index = index
+        self.file = open(atlas_path, "rb")
+        self.atlas = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.loaded = {}
+        self.timings = {}
+
+    @classmethod
+    def open(cls, cache_dir=ASSET_CACHE_DIR, sprites=SPRITES):
+        start = time.perf_counter()
+        index_path = os.path.join(cache_dir, "sprites.json")
+        atlas_path = os.path.join(cache_dir, "sprites.atlas")
+        index = None
+        if os.path.exists(index_path) and os.path.exists(atlas_path):
+            with open(index_path) as f:
+                index = json.load(f)
+            if index.get("hash") != source_hash(sprites):
+                index = None
+        rebuilt = index is None
+        if rebuilt:
+            index = build_pack(cache_dir, sprites)
+        pack = cls(index, atlas_path)
+        pack.timings["build" if rebuilt else "open"] = time.perf_counter() - start
+        return pack
+
+    def frames(self, name):
+        """Return the frame surfaces of a sprite, loading it on first use."""
+        frames = self.loaded.get(name)
+        if frames is None:
+            start = time.perf_counter()
+            entry = self.index["sprites"][name]
+            width, height = entry["size"]
+            offset = entry["offset"]
+            pixels = self.atlas[offset:offset + width * height * 4]
+            strip = pygame.image.frombuffer(pixels, (width, height), "RGBA")
+            if pygame.display.get_surface():
+                strip = strip.convert_alpha()
+            frames = [strip.subsurface(rect) for rect in entry["frames"]]
+            self.loaded[name] = frames
+            self.timings[name] = time.perf_counter() - start
+        return frames
+
+    def report(self):
+        return {name: seconds * 1000 for name, seconds in self.timings.items()}
+
+    def close(self):
+        """Unmap the atlas; frames that were already loaded stay usable."""
+        if self.atlas is not None:
+            self.atlas.close()
+            self.file.close()
+            self.atlas = None
+
+
+def main():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    start = time.perf_counter()
+    build_pack()
+    print(f"Built pack in {(time.perf_counter() - start) * 1000:.2f}ms")
+    pack = AssetPack.open()
+    for name in pack.index["sprites"]:
+        pack.frames(name)
+    for name, ms in pack.report().items():
+        print(f"  {name}: {ms:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
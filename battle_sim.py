@@ -0,0 +1,201 @@
+"""Headless battle simulator for balance runs.
+
+Reproduces the damage rules of ``Battle.player_move`` / ``Battle.enemy_move``
+and draws coins and items from the same alias samplers as ``Battle``, but
+resolves many fights at once as NumPy arrays.  Nothing here touches pygame;
+enemy stats come from a ``create_enemy(name, level)`` factory passed in by
+the caller.
+"""
+
+import numpy as np
+
+from encounters import EncounterTable
+from sampling import coin_sampler, item_sampler
+from rooms import start_room, walk_room_data
+
+
+class EnemyTable:
+    """Per (name, level) enemy stats looked up with index arrays."""
+
+    def __init__(self, create_enemy, names, levels):
+        self.names = list(names)
+        self.levels = sorted(set(int(lvl) for lvl in np.ravel(levels)))
+        shape = (len(self.names), max(self.levels) + 1)
+        self.hp = np.zeros(shape, dtype=np.int32)
+        self.strength = np.zeros(shape, dtype=np.int32)
+        self.defense = np.zeros(shape, dtype=np.int32)
+        self.xp = np.zeros(shape, dtype=np.int32)
+        self.slime_chance = np.zeros(shape)
+        for i, name in enumerate(self.names):
+            for lvl in self.levels:
+                enemy = create_enemy(name, lvl)
+                self.hp[i, lvl] = enemy.max_hp
+                self.strength[i, lvl] = enemy.strength
+                self.defense[i, lvl] = enemy.defense
+                self.xp[i, lvl] = enemy.xp
+                self.slime_chance[i, lvl] = enemy.moves.count("Slime") / len(enemy.moves)
+
+
+class SimResult:
+    """Outcome arrays for a batch of simulated battles."""
+
+    def __init__(self, won, turns, xp, coins, item, item_names):
+        self.won = won
+        self.turns = turns
+        self.xp = xp
+        self.coins = coins
+        self.item = item
+        self.item_names = item_names
+
+    def win_rate(self):
+        return float(self.won.mean()) if self.won.size else 0.0
+
+    def turns_to_kill(self):
+        """Histogram of player turns needed in won fights."""
+        return np.bincount(self.turns[self.won])
+
+    def xp_distribution(self):
+        return np.bincount(self.xp)
+
+    def coin_distribution(self):
+        return np.bincount(self.coins)
+
+    def item_counts(self):
+        counts = np.bincount(self.item[self.item >= 0], minlength=len(self.item_names))
+        return dict(zip(self.item_names, counts.tolist()))
+
+    def summary(self):
+        won_turns = self.turns[self.won]
+        return {
+            "battles": int(self.won.size),
+            "win_rate": self.win_rate(),
+            "mean_turns_to_kill": float(won_turns.mean()) if won_turns.size else 0.0,
+            "mean_xp": float(self.xp.mean()) if self.xp.size else 0.0,
+            "mean_coins": float(self.coins.mean()) if self.coins.size else 0.0,
+            "items": self.item_counts(),
+        }
+
+
+def simulate(hp, strength, defense, enemy_levels, enemy_names, create_enemy,
+             drop_table=0, hardcore=False, prepare_turns=0, seed=None, max_turns=200,
+             enemy_weights=None):
+    """Run one battle per element of the broadcast input arrays.
+
+    ``hp``, ``strength``, ``defense``, ``enemy_levels`` and ``prepare_turns``
+    may be scalars or arrays.  ``enemy_names`` is a name or a list of names
+    picked per fight, uniformly or with the probabilities in
+    ``enemy_weights`` like a room's encounter table.  The player
+    uses Prepare for the first ``prepare_turns`` turns and Slash afterwards.
+    ``drop_table`` is the room's key into ``ITEM_DROP``.
+    """
+    rng = np.random.default_rng(seed)
+    if isinstance(enemy_names, str):
+        enemy_names = [enemy_names]
+    hp, strength, defense, levels, prepare_turns = np.broadcast_arrays(
+        np.asarray(hp, dtype=np.int32),
+        np.asarray(strength, dtype=np.int32),
+        np.asarray(defense, dtype=np.int32),
+        np.asarray(enemy_levels, dtype=np.int32) + (1 if hardcore else 0),
+        np.asarray(prepare_turns, dtype=np.int32),
+    )
+    hp = hp.ravel().copy()
+    strength = strength.ravel()
+    defense = defense.ravel().copy()
+    levels = levels.ravel()
+    prepare_turns = prepare_turns.ravel()
+    n = hp.size
+
+    table = EnemyTable(create_enemy, enemy_names, levels)
+    kind = rng.choice(len(enemy_names), n, p=enemy_weights)
+    enemy_hp = table.hp[kind, levels].copy()
+    enemy_str = table.strength[kind, levels]
+    enemy_def = table.defense[kind, levels]
+    slime_chance = table.slime_chance[kind, levels]
+
+    won = np.zeros(n, dtype=bool)
+    turns = np.zeros(n, dtype=np.int32)
+    active = np.ones(n, dtype=bool)
+    for turn in range(max_turns):
+        idx = np.flatnonzero(active)
+        if not idx.size:
+            break
+        turns[idx] += 1
+        # Player move: Prepare raises defense for the rest of the fight.
+        # Slime's speed penalty is not simulated since speed never enters
+        # the damage formulas.
+        preparing = turn < prepare_turns[idx]
+        defense[idx[preparing]] += 1
+        slash = idx[~preparing]
+        dmg = rng.integers(4, 7, slash.size) + strength[slash] - enemy_def[slash]
+        enemy_hp[slash] -= np.maximum(1, dmg)
+        killed = slash[enemy_hp[slash] <= 0]
+        won[killed] = True
+        active[killed] = False
+        # Enemy move
+        idx = idx[active[idx]]
+        slime = rng.random(idx.size) < slime_chance[idx]
+        roll = np.where(slime, rng.integers(1, 3, idx.size), rng.integers(2, 5, idx.size))
+        dmg = roll + enemy_str[idx] - defense[idx]
+        hp[idx] -= np.maximum(1, dmg)
+        active[idx[hp[idx] <= 0]] = False
+
+    xp = np.where(won, table.xp[kind, levels], 0)
+    coins = np.zeros(n, dtype=np.int64)
+    for lvl in table.levels:
+        at_level = np.flatnonzero(levels == lvl)
+        sampler = coin_sampler(lvl)
+        values = np.array(sampler.outcomes)
+        coins[at_level] = values[sampler.sample_many(at_level.size, rng)]
+    coins = np.where(won, coins, 0)
+
+    # The sampler's last outcome is None (no drop)
+    sampler = item_sampler(drop_table)
+    item_names = sampler.outcomes[:-1]
+    item = sampler.sample_many(n, rng).astype(np.int32)
+    item[(item >= len(item_names)) | ~won] = -1
+    return SimResult(won, turns, xp, coins, item, item_names)
+
+
+def win_rates_by_level(hp, strength, defense, enemy_names, create_enemy, levels,
+                       battles=100000, **kwargs):
+    """Win rate for each enemy level with a fixed player stat line."""
+    rates = {}
+    for lvl in levels:
+        result = simulate(
+            np.full(battles, hp), strength, defense, lvl, enemy_names, create_enemy, **kwargs
+        )
+        rates[lvl] = result.win_rate()
+    return rates
+
+
+def main():
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from main import Player, create_enemy
+
+    player = Player(0, 0, [pygame.Surface((32, 32))])
+    for hardcore in (False, True):
+        print("Hardcore" if hardcore else "Regular")
+        for room in walk_room_data(start_room()):
+            enemies = EncounterTable.from_data(room.get("enemies"))
+            if not enemies:
+                continue
+            probs = enemies.probabilities()
+            names = list(probs)
+            level = room.get("enemy_level", 1)
+            result = simulate(
+                np.full(100000, player.hp), player.strength, player.defense, level,
+                names, create_enemy, drop_table=room.get("drop_table"), hardcore=hardcore,
+                enemy_weights=list(probs.values()),
+            )
+            stats = result.summary()
+            print(
+                f"  {room.get('name', room['id'])} {'/'.join(names)} Lv.{level}: "
+                f"win {stats['win_rate']:.1%}, turns {stats['mean_turns_to_kill']:.2f}, "
+                f"xp {stats['mean_xp']:.2f}, coins {stats['mean_coins']:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
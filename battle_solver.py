@@ -0,0 +1,145 @@
+"""Exact battle odds by dynamic programming over the fight's Markov chain.
+
+A fight is in state (player HP, enemy HP, Prepare uses so far) at the start
+of each player turn.  Every transition follows the damage rolls of
+``Battle.player_move`` and ``Battle.enemy_move``: Slash hits for 4-6 plus
+strength minus the enemy's defense, and the enemy answers with a move picked
+uniformly from its list (Slime 1-2, Scratch 2-4, minus the player's
+defense), with every hit doing at least 1.  Each state is solved once for
+the win probability, the expected number of player turns and the move that
+maximises the win chance (fewer turns breaks ties).
+
+Slime's slow counter is not part of the state: speed never enters a damage
+roll, so it cannot change any outcome.  Prepare stops being offered once
+every enemy hit is already down to the minimum of 1.
+
+Run ``python battle_solver.py`` for the exact odds of each room's enemies.
+"""
+
+import sys
+from functools import lru_cache
+
+PLAYER_ROLLS = (4, 5, 6)
+ENEMY_ROLLS = {"Slime": (1, 2), "Scratch": (2, 3, 4)}
+EPSILON = 1e-12
+
+
+def uniform(rolls, weight=1.0):
+    return [(roll, weight / len(rolls)) for roll in rolls]
+
+
+def damage_distribution(rolls, bonus):
+    """``((damage, probability), ...)`` for ``(roll, probability)`` pairs
+    plus ``bonus``."""
+    probs = {}
+    for roll, p in rolls:
+        dmg = max(1, roll + bonus)
+        probs[dmg] = probs.get(dmg, 0.0) + p
+    return tuple(sorted(probs.items()))
+
+
+class FightSolution:
+    """Memoized values for one matchup of player and enemy stats."""
+
+    def __init__(self, strength, defense, enemy_strength, enemy_defense, enemy_moves):
+        self.slash = damage_distribution(uniform(PLAYER_ROLLS), strength - enemy_defense)
+        # Any move other than Slime uses the Scratch roll, as in enemy_move
+        rolls = [
+            pair for move in enemy_moves
+            for pair in uniform(ENEMY_ROLLS.get(move, ENEMY_ROLLS["Scratch"]), 1 / len(enemy_moves))
+        ]
+        top = max(roll for roll, _ in rolls)
+        self.max_prepare = max(0, top + enemy_strength - defense - 1)
+        self.enemy_hits = [
+            damage_distribution(rolls, enemy_strength - defense - prepare)
+            for prepare in range(self.max_prepare + 1)
+        ]
+        self.memo = {}
+
+    def value(self, hp, enemy_hp, prepare=0):
+        """(win probability, expected turns, best move) at a player turn."""
+        if enemy_hp <= 0:
+            return 1.0, 0.0, None
+        if hp <= 0:
+            return 0.0, 0.0, None
+        prepare = min(prepare, self.max_prepare)
+        key = (hp, enemy_hp, prepare)
+        result = self.memo.get(key)
+        if result is not None:
+            return result
+        best = None
+        for move in ("Slash", "Prepare"):
+            if move == "Slash":
+                win = turns = 0.0
+                for dmg, p in self.slash:
+                    if dmg >= enemy_hp:
+                        win += p
+                        turns += p
+                    else:
+                        w, t = self.enemy_turn(hp, enemy_hp - dmg, prepare)
+                        win += p * w
+                        turns += p * (1 + t)
+            elif prepare < self.max_prepare:
+                win, turns = self.enemy_turn(hp, enemy_hp, prepare + 1)
+                turns += 1
+            else:
+                continue
+            if best is None or win > best[0] + EPSILON or (win > best[0] - EPSILON and turns < best[1]):
+                best = (win, turns, move)
+        self.memo[key] = best
+        return best
+
+    def enemy_turn(self, hp, enemy_hp, prepare):
+        win = turns = 0.0
+        for dmg, p in self.enemy_hits[prepare]:
+            if dmg < hp:
+                w, t, _ = self.value(hp - dmg, enemy_hp, prepare)
+                win += p * w
+                turns += p * t
+        return win, turns
+
+    def policy(self, hp, enemy_hp, prepare=0):
+        return self.value(hp, enemy_hp, prepare)[2]
+
+
+@lru_cache(maxsize=256)
+def solve(strength, defense, enemy_strength, enemy_defense, enemy_moves):
+    """Shared ``FightSolution`` for a stat tuple; ``enemy_moves`` is a tuple."""
+    return FightSolution(strength, defense, enemy_strength, enemy_defense, enemy_moves)
+
+
+def odds(player, enemy):
+    """(win probability, expected turns, best move) for a fight in progress.
+
+    The player's current defense already includes any Prepare used so far.
+    """
+    solution = solve(player.strength, player.defense, enemy.strength, enemy.defense, tuple(enemy.moves))
+    return solution.value(player.hp, enemy.hp)
+
+
+def main():
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from encounters import EncounterTable
+    from main import Player, create_enemy
+    from rooms import start_room, walk_room_data
+
+    player = Player(0, 0, [pygame.Surface((32, 32))])
+    for hardcore in (False, True):
+        print("Hardcore" if hardcore else "Regular")
+        for room in walk_room_data(start_room()):
+            enemies = EncounterTable.from_data(room.get("enemies"))
+            level = room.get("enemy_level", 1) + (1 if hardcore else 0)
+            for name, weight in enemies.probabilities().items():
+                enemy = create_enemy(name, level)
+                win, turns, move = odds(player, enemy)
+                print(
+                    f"  {room.get('name', room['id'])} {name} Lv.{level} ({weight:.0%}): "
+                    f"win {win:.1%}, turns {turns:.2f}, open with {move}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""Headless per-screen frame-time benchmarks.
+
+Each scenario puts a real ``Game`` into one screen state and drives frames
+through its ``handle_event``/``update``/``draw`` steps with the dummy video
+driver.  Results are printed as a table and can be written as JSON and
+compared against an earlier run:
+
+    python bench.py --json new.json --compare old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+import pygame
+
+import main as game_main
+from keystate import NO_KEYS, HeldKeys
+
+WALK_KEYS = [pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT, pygame.K_UP]
+
+
+def new_game(assets=None):
+    game_main.init_pygame()
+    screen = pygame.display.set_mode((game_main.SCREEN_WIDTH, game_main.SCREEN_HEIGHT))
+    font = game_main.get_font(32)
+    game_main.random.seed(0)
+    game = game_main.Game(screen, font, hardcore=False, render=False, assets=assets)
+    return game
+
+
+def walk(game, frame):
+    # Square loop around the start position; never leaves the first room
+    return HeldKeys(WALK_KEYS[(frame // 30) % 4]), []
+
+
+def idle(game, frame):
+    return NO_KEYS, []
+
+
+def open_menu(game):
+    game.menu.show()
+    game.open_view(game.menu)
+
+
+def open_team(game):
+    open_menu(game)
+    game.open_view(game.team_view)
+
+
+def open_bag(game):
+    open_menu(game)
+    game.bag_view.open()
+    game.open_view(game.bag_view)
+
+
+def open_shop(game):
+    game.shop_view.open()
+    game.open_view(game.shop_view)
+
+
+def open_anvil(game):
+    game.anvil_view.open(game.player)
+    game.open_view(game.anvil_view)
+
+
+def open_levelup(game):
+    game.player.stat_points = 1
+    game.levelup_view.start()
+    game.open_view(game.levelup_view, game.levelup_view.draw)
+
+
+def battle_state(state):
+    def setup(game):
+        game.start_battle("Slime", 1)
+        while game.transition:
+            game.update(NO_KEYS)
+        game.battle.msg_timer = 0
+
+    def frame(game, n):
+        # Hold the battle in the requested state so every frame costs the same
+        battle = game.battle
+        battle.state = state
+        battle.msg_timer = 60
+        battle.message = "" if state in ("menu", "moves") else "You used Slash! Slime took 5 damage."
+        battle.enemy.hp = battle.enemy.max_hp
+        game.player.hp = game.player.max_hp
+        return NO_KEYS, []
+
+    return setup, frame
+
+
+SCENARIOS = {
+    "map_walk": (None, walk),
+    "map_idle": (None, idle),
+    "menu": (open_menu, idle),
+    "team": (open_team, idle),
+    "bag": (open_bag, idle),
+    "shop": (open_shop, idle),
+    "anvil": (open_anvil, idle),
+    "levelup": (open_levelup, idle),
+}
+for _state in ("menu", "moves", "message", "enemy", "victory", "defeat", "run"):
+    SCENARIOS[f"battle_{_state}"] = battle_state(_state)
+
+
+def run_frames(game, script, frames, on_frame=None):
+    for n in range(frames):
+        keys, events = script(game, n)
+        if on_frame:
+            on_frame(True)
+        for event in events:
+            game.handle_event(event)
+        game.update(keys)
+        game.draw()
+        if on_frame:
+            on_frame(False)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def bench_scenario(name, frames, warmup, assets=None):
+    setup, script = SCENARIOS[name]
+    game = new_game(assets)
+    try:
+        return measure(game, setup, script, frames, warmup)
+    finally:
+        game.rooms.close()
+
+
+def measure(game, setup, script, frames, warmup):
+    if setup:
+        setup(game)
+    run_frames(game, script, warmup)
+
+    times = []
+    start = [0.0]
+
+    def timer(begin):
+        if begin:
+            start[0] = time.perf_counter()
+        else:
+            times.append(time.perf_counter() - start[0])
+
+    run_frames(game, script, frames, timer)
+
+    # Separate pass so tracing overhead does not skew the timings.  This is
+    # the high-water mark of traced memory within each frame, not the total
+    # allocated: memory freed and reused mid-frame is only counted once.
+    peaks = []
+    tracemalloc.start()
+
+    def tracer(begin):
+        if begin:
+            tracemalloc.reset_peak()
+            start[0] = tracemalloc.get_traced_memory()[0]
+        else:
+            peaks.append(tracemalloc.get_traced_memory()[1] - start[0])
+
+    run_frames(game, script, min(frames, 200), tracer)
+    tracemalloc.stop()
+
+    ms = [t * 1000 for t in times]
+    total = sum(times)
+    return {
+        "frames": frames,
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "max_ms": max(ms),
+        "fps": frames / total if total else 0.0,
+        "peak_alloc_bytes_per_frame": statistics.fmean(peaks),
+    }
+
+
+def compare(results, baseline):
+    print()
+    print(f"{'scenario':<18}{'p50 old':>10}{'p50 new':>10}{'change':>9}")
+    for name, res in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        change = (res["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+        print(f"{name:<18}{old['p50_ms']:>10.3f}{res['p50_ms']:>10.3f}{change:>8.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each game screen headless")
+    parser.add_argument("scenarios", nargs="*", help=f"subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--json", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="JSON results of an earlier run")
+    args = parser.parse_args(argv)
+
+    names = args.scenarios or list(SCENARIOS)
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name}")
+
+    results = {}
+    # One sprite pack for every scenario's Game
+    game_main.init_pygame()
+    assets = game_main.AssetPack.open()
+    print(f"{'scenario':<18}{'mean':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'fps':>9}{'peak/f':>10}")
+    try:
+        for name in names:
+            res = bench_scenario(name, args.frames, args.warmup, assets)
+            results[name] = res
+            print(
+                f"{name:<18}{res['mean_ms']:>8.3f}{res['p50_ms']:>8.3f}{res['p95_ms']:>8.3f}"
+                f"{res['p99_ms']:>8.3f}{res['fps']:>9.0f}{res['peak_alloc_bytes_per_frame']:>9.0f}B"
+            )
+    finally:
+        assets.close()
+
+    if args.json:
+        data = {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(data, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Dirty-rectangle presentation for the map screen."""
+
+import pygame
+
+
+class DirtyRenderer:
+    """Pushes only the screen regions whose sprites changed.
+
+    The caller passes the room's static layer as ``background``; when it is
+    a different surface than last frame (a room change) the whole screen is
+    redrawn.  Otherwise each frame restores the background under last
+    frame's sprites, draws the new ones and updates the union of both.
+    Frames where nothing moved return no rects at all.
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.background = None
+        self.prev = []
+
+    def invalidate(self):
+        self.background = None
+
+    def draw(self, background, sprites):
+        """Draw ``sprites`` (a list of (surface, rect)) over ``background``.
+
+        Returns the rects to push to the display, or None when the whole
+        screen was redrawn and needs a flip.
+        """
+        sprites = [(surf, pygame.Rect(rect)) for surf, rect in sprites]
+        if background is not self.background:
+            self.background = background
+            self.screen.blit(background, (0, 0))
+            for surf, rect in sprites:
+                self.screen.blit(surf, rect)
+            self.prev = sprites
+            return None
+        if sprites == self.prev:
+            return []
+        dirty = [rect for _, rect in self.prev]
+        for rect in dirty:
+            self.screen.blit(background, rect, rect)
+        for surf, rect in sprites:
+            self.screen.blit(surf, rect)
+            dirty.append(rect)
+        self.prev = sprites
+        return dirty
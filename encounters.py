@@ -0,0 +1,105 @@
+"""Distance-based random encounters and weighted per-room enemy tables.
+
+``EncounterScheduler`` draws how far the player has to walk inside
+encounter zones before the next fight, once per encounter, and counts the
+distance actually moved down to zero, so standing still never triggers a
+fight and nothing is rolled per frame.  The distance is a uniform minimum
+plus an exponential tail, which matches the old per-frame roll (a 120-300
+tick grace period, then a 40% chance per moving tick) at walking speed.
+Rooms can override it with ``encounter_distance``.
+
+Run ``python encounters.py`` for the expected encounters per minute of
+walking in each room.
+"""
+
+import random
+import sys
+from bisect import bisect
+from itertools import accumulate
+
+# (min low, min high, mean tail) in pixels walked inside an encounter zone
+DEFAULT_DISTANCE = (480, 1200, 10)
+
+
+class EncounterTable:
+    """Weighted choice of enemy names for one room."""
+
+    def __init__(self, weights=()):
+        weights = [(name, weight) for name, weight in weights if weight > 0]
+        self.names = [name for name, _ in weights]
+        self.cumulative = list(accumulate(weight for _, weight in weights))
+
+    @classmethod
+    def from_data(cls, data):
+        """Accept a ``{name: weight}`` mapping or a plain list of names."""
+        if not data:
+            return cls()
+        if isinstance(data, dict):
+            return cls(data.items())
+        return cls((name, 1) for name in data)
+
+    def __bool__(self):
+        return bool(self.names)
+
+    def choose(self, rng=random):
+        return self.names[bisect(self.cumulative, rng.random() * self.cumulative[-1])]
+
+    def probabilities(self):
+        total = self.cumulative[-1] if self.cumulative else 0
+        previous = 0
+        probs = {}
+        for name, cumulative in zip(self.names, self.cumulative):
+            probs[name] = (cumulative - previous) / total
+            previous = cumulative
+        return probs
+
+
+def mean_distance(distance=DEFAULT_DISTANCE):
+    low, high, tail = distance
+    return (low + high) / 2 + tail
+
+
+class EncounterScheduler:
+    """Counts distance walked down to the next encounter."""
+
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.remaining = None
+
+    def draw(self, distance=DEFAULT_DISTANCE):
+        low, high, tail = distance
+        return self.rng.uniform(low, high) + self.rng.expovariate(1 / tail)
+
+    def advance(self, moved, distance=DEFAULT_DISTANCE):
+        """Walk ``moved`` pixels; return True when an encounter is due."""
+        if not moved:
+            return False
+        if self.remaining is None:
+            self.remaining = self.draw(distance)
+        self.remaining -= moved
+        if self.remaining > 0:
+            return False
+        self.remaining = None
+        return True
+
+
+def main():
+    from gamedata import FIXED_DT, PLAYER_SPEED, RUN_SPEED
+    from rooms import start_room, walk_room_data
+
+    per_minute = 60 / FIXED_DT
+    print(f"{'room':<18}{'walk/min':>10}{'run/min':>10}  enemies")
+    for room in walk_room_data(start_room()):
+        table = EncounterTable.from_data(room.get("enemies"))
+        if not room.get("encounter_rect") or not table:
+            continue
+        mean = mean_distance(tuple(room.get("encounter_distance", DEFAULT_DISTANCE)))
+        walk = PLAYER_SPEED * per_minute / mean
+        run = RUN_SPEED * per_minute / mean
+        enemies = ", ".join(f"{name} {p:.0%}" for name, p in table.probabilities().items())
+        print(f"{room.get('name', room['id']):<18}{walk:>10.2f}{run:>10.2f}  {enemies}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Balance tables shared by the game and the headless tools."""
+
+FIXED_DT = 1 / 60  # seconds of game time per update tick
+PLAYER_SPEED = 4  # pixels per tick
+RUN_SPEED = 8
+
+COIN_DROP = {
+    1: (1, 3),
+    2: (2, 4),
+    3: (3, 5),
+}
+
+# Item drop chances per room
+ITEM_DROP = {
+    0: [
+        ("Health Potion", 0.15),
+        ("Elite Scraps", 0.05),
+        ("Good Scraps", 0.10),
+        ("Scraps", 0.20),
+    ],
+    1: [
+        ("Health Potion", 0.15),
+        ("Elite Scraps", 0.05),
+        ("Good Scraps", 0.10),
+        ("Scraps", 0.20),
+        ("Slime", 0.10),
+    ],
+}
+
+# Item definitions used for the shop and inventory
+ITEMS = {
+    "ShortSword": {
+        "type": "weapon",
+        "strength": 1,
+        "price": 5,
+    },
+    "LongSword": {
+        "type": "weapon",
+        "strength": 3,
+        "speed": -1,
+        "price": 10,
+    },
+    "Health Potion": {
+        "type": "potion",
+        "heal": 5,
+        "price": 3,
+        "stack": 5,
+    },
+    "Scraps": {
+        "type": "craft",
+        "price": 1,
+        "stack": 25,
+    },
+    "Good Scraps": {
+        "type": "craft",
+        "price": 2,
+        "stack": 25,
+    },
+    "Elite Scraps": {
+        "type": "craft",
+        "price": 3,
+        "stack": 25,
+    },
+    "Slime": {
+        "type": "craft",
+        "price": 2,
+        "stack": 5,
+    },
+}
@@ -0,0 +1,217 @@
+"""Indexed 5x5 inventory used by the player's bag."""
+
+from bisect import bisect_left, insort
+
+from gamedata import ITEMS
+
+BAG_SIZE = 25
+
+
+class Slot:
+    """One occupied bag cell."""
+
+    __slots__ = ("name", "qty")
+
+    def __init__(self, name, qty=1):
+        self.name = name
+        self.qty = qty
+
+    def __getitem__(self, key):
+        # Older code reads slots as {"name": ..., "qty": ...} dicts
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {"name": self.name, "qty": self.qty}
+
+
+def _discard(indices, idx):
+    pos = bisect_left(indices, idx)
+    if pos < len(indices) and indices[pos] == idx:
+        del indices[pos]
+
+
+class Inventory:
+    """Grid of item slots with per-name totals and lookup indexes.
+
+    ``free`` holds the empty slot indices, ``partial`` the stacks of each
+    item that still have room and ``where`` every slot holding an item, all
+    kept sorted so the first match is at the front.  Items are placed exactly
+    like the old linear scan: in the lowest slot that is either empty or a
+    partial stack of the same item.  ``listener``, when set, is called with
+    the index and new contents of every slot that changes.
+
+    ``add_many`` and ``take_many`` move several items at once, stack by stack
+    rather than one at a time, and check the whole request before touching a
+    slot: either every item moves or nothing changes.  ``add_many`` tops up
+    existing stacks before opening new slots so it never needs more room than
+    ``can_add`` counted.
+    """
+
+    def __init__(self, size=BAG_SIZE):
+        self.slots = [None] * size
+        self.totals = {}
+        self.partial = {}
+        self.where = {}
+        self.free = list(range(size))
+        self.listener = None
+
+    @classmethod
+    def from_list(cls, data, size=BAG_SIZE):
+        inv = cls(size)
+        for i, item in enumerate(data[:size]):
+            if item:
+                inv.put(i, item["name"], item["qty"])
+        return inv
+
+    def to_list(self):
+        return [slot.to_dict() if slot else None for slot in self.slots]
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, index):
+        return self.slots[index]
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    @staticmethod
+    def stack_limit(name):
+        return ITEMS.get(name, {}).get("stack", 1)
+
+    def count(self, name):
+        return self.totals.get(name, 0)
+
+    def has_free_slot(self):
+        return bool(self.free)
+
+    def space_for(self, name):
+        """How many of ``name`` fit in existing stacks without a new slot."""
+        limit = self.stack_limit(name)
+        return sum(limit - self.slots[i].qty for i in self.partial.get(name, ()))
+
+    def can_add(self, items):
+        """Whether every ``{name: qty}`` in ``items`` fits at once."""
+        slots_needed = 0
+        for name, qty in items.items():
+            extra = qty - self.space_for(name)
+            if extra > 0:
+                limit = self.stack_limit(name)
+                slots_needed += (extra + limit - 1) // limit
+        return slots_needed <= len(self.free)
+
+    def add_many(self, items):
+        """Add ``{name: qty}`` in one pass; False (and no change) if it won't fit.
+
+        Existing stacks are topped up before any free slot is used, so this
+        succeeds exactly when ``can_add`` says it will.
+        """
+        if not self.can_add(items):
+            return False
+        for name, qty in items.items():
+            limit = self.stack_limit(name)
+            while qty > 0:
+                stacks = self.partial.get(name)
+                if stacks:
+                    index = stacks[0]
+                    slot = self.slots[index]
+                    moved = min(qty, limit - slot.qty)
+                    slot.qty += moved
+                    self.totals[name] += moved
+                    if slot.qty >= limit:
+                        del stacks[0]
+                    if self.listener:
+                        self.listener(index, slot)
+                else:
+                    moved = min(qty, limit)
+                    self.put(self.free[0], name, moved)
+                qty -= moved
+        return True
+
+    def take_many(self, items):
+        """Remove ``{name: qty}`` from the lowest slots first; False (and no
+        change) if any name is short."""
+        if any(self.count(name) < qty for name, qty in items.items()):
+            return False
+        for name, qty in items.items():
+            while qty > 0:
+                index = self.where[name][0]
+                moved = min(qty, self.slots[index].qty)
+                self.remove_at(index, moved)
+                qty -= moved
+        return True
+
+    def put(self, index, name, qty):
+        """Place ``qty`` of ``name`` into the empty slot ``index``."""
+        self.slots[index] = Slot(name, qty)
+        _discard(self.free, index)
+        insort(self.where.setdefault(name, []), index)
+        if qty < self.stack_limit(name):
+            insort(self.partial.setdefault(name, []), index)
+        self.totals[name] = self.totals.get(name, 0) + qty
+        if self.listener:
+            self.listener(index, self.slots[index])
+
+    def add(self, name):
+        target = self.free[0] if self.free else None
+        stacks = self.partial.get(name)
+        if stacks and (target is None or stacks[0] < target):
+            target = stacks[0]
+        if target is None:
+            return False
+        slot = self.slots[target]
+        if slot is None:
+            self.put(target, name, 1)
+            return True
+        slot.qty += 1
+        self.totals[name] += 1
+        if slot.qty >= self.stack_limit(name):
+            del stacks[0]
+        if self.listener:
+            self.listener(target, slot)
+        return True
+
+    def remove_at(self, index, qty=1):
+        """Remove ``qty`` items (at most the stack) from ``index`` and return
+        the item's name."""
+        slot = self.slots[index]
+        if not slot:
+            return None
+        name = slot.name
+        qty = min(qty, slot.qty)
+        limit = self.stack_limit(name)
+        was_full = slot.qty >= limit
+        slot.qty -= qty
+        self.totals[name] -= qty
+        if not self.totals[name]:
+            del self.totals[name]
+        if slot.qty <= 0:
+            self.slots[index] = None
+            insort(self.free, index)
+            _discard(self.where[name], index)
+            _discard(self.partial.get(name, []), index)
+        elif was_full and slot.qty < limit:
+            insort(self.partial.setdefault(name, []), index)
+        if self.listener:
+            self.listener(index, self.slots[index])
+        return name
+
+    def set(self, index, name, qty):
+        """Overwrite a slot; ``name`` of None empties it."""
+        slot = self.slots[index]
+        if slot:
+            listener, self.listener = self.listener, None
+            self.remove_at(index, slot.qty)
+            self.listener = listener
+        if name:
+            self.put(index, name, qty)
+        elif self.listener:
+            self.listener(index, None)
+
+    def take(self, name):
+        """Remove one of the given item from the first slot holding it."""
+        indices = self.where.get(name)
+        if not indices:
+            return False
+        self.remove_at(indices[0])
+        return True
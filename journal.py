@@ -0,0 +1,192 @@
+"""Append-only journal of state changes between saves.
+
+Every save (and the start of a session) begins a new journal with a
+``base`` entry holding a full snapshot.  After that only small deltas are
+appended: inventory slots as they change, the player's fields after a
+battle, purchase, upgrade or level-up, room changes and what is sitting in
+the anvil's slots (taken out of the bag but not yet used).  The main thread
+just queues entries; a background thread writes them out in batches and
+fsyncs each batch.  A clean quit deletes the journal, so finding one on
+startup means the last session crashed and ``recover`` can rebuild its
+state from the base snapshot plus the entries after it; anything left on
+the anvil goes back into the bag.  A journal without a base entry (a crash
+before the first write, or a torn file) holds nothing to recover and is
+discarded.
+"""
+
+import json
+import os
+import threading
+
+from savegame import SAVE_DIR, apply_snapshot, compatible, player_fields
+
+JOURNAL_FILE = os.path.join(SAVE_DIR, "journal.log")
+FLUSH_INTERVAL = 0.5  # seconds
+
+
+def apply_entry(player, entry):
+    kind = entry["t"]
+    if kind == "base":
+        apply_snapshot(player, entry["data"])
+    elif kind == "slot":
+        item = entry["item"]
+        if item:
+            player.inventory.set(entry["i"], item[0], item[1])
+        else:
+            player.inventory.set(entry["i"], None, 0)
+    elif kind == "player":
+        for field, value in entry["data"].items():
+            setattr(player, field, value)
+        player.recalc_stats()
+    elif kind == "room":
+        player.room_id = entry["room"]
+        player.rect.topleft = entry["pos"]
+
+
+def read_entries(path=JOURNAL_FILE):
+    """Entries from the last base onwards; a torn final line is dropped."""
+    entries = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry["t"] == "base":
+                    entries = []
+                entries.append(entry)
+    except OSError:
+        return []
+    if not entries or entries[0]["t"] != "base" or not compatible(entries[0]["data"]):
+        return []
+    return entries
+
+
+class Journal:
+    """Batches entries on the main thread and appends them from a worker."""
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.entries = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.file = None
+        self.thread = None
+        self.running = False
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def pending(self):
+        """Entries left by a crashed session; a journal with none is removed."""
+        entries = read_entries(self.path)
+        if not entries and self.exists():
+            os.remove(self.path)
+        return entries
+
+    def recover(self, player, entries=None):
+        """Rebuild the crashed session's state; return True if there was one."""
+        if entries is None:
+            entries = read_entries(self.path)
+        held = {}
+        for entry in entries:
+            if entry["t"] == "anvil":
+                held = entry["items"]
+            else:
+                apply_entry(player, entry)
+        if held and not player.inventory.add_many(held):
+            for name, qty in held.items():
+                for _ in range(qty):
+                    player.add_item(name)
+        return bool(entries)
+
+    def start(self, player, base):
+        """Begin journaling ``player`` from the snapshot ``base``."""
+        player.inventory.listener = self.record_slot
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, name="journal", daemon=True)
+            self.thread.start()
+        self.rebase(base)
+
+    def rebase(self, data):
+        """Start a fresh journal whose base is the snapshot ``data``."""
+        self.append({"t": "base", "data": data})
+
+    def append(self, entry):
+        if not self.running:
+            return
+        with self.lock:
+            self.entries.append(entry)
+
+    def record_slot(self, index, slot):
+        self.append({"t": "slot", "i": index, "item": [slot.name, slot.qty] if slot else None})
+
+    def record_player(self, player):
+        data = player_fields(player)
+        del data["room_id"]
+        self.append({"t": "player", "data": data})
+
+    def record_anvil(self, items):
+        """``{name: qty}`` currently held in the anvil's slots."""
+        self.append({"t": "anvil", "items": dict(items)})
+
+    def record_room(self, player):
+        self.append({"t": "room", "room": player.room_id, "pos": list(player.rect.topleft)})
+
+    def run(self):
+        while self.running:
+            self.wake.wait(FLUSH_INTERVAL)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            entries, self.entries = self.entries, []
+        if not entries:
+            return
+        # Only the newest base matters; everything before it is superseded
+        start = 0
+        for i, entry in enumerate(entries):
+            if entry["t"] == "base":
+                start = i
+        if entries[start]["t"] == "base":
+            self.reopen(entries[start])
+            start += 1
+        if self.file is None:
+            return
+        self.file.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries[start:]))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def reopen(self, base):
+        """Write ``base`` to a new journal and swap it in atomically."""
+        if self.file:
+            self.file.close()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(base, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, "a")
+
+    def close(self, clean=True):
+        """Stop the writer; a clean close removes the journal."""
+        if not self.running:
+            return
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+        self.thread = None
+        self.flush()
+        if self.file:
+            self.file.close()
+            self.file = None
+        if clean and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+journal = Journal()
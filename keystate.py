@@ -0,0 +1,17 @@
+"""Stand-in for ``pygame.key.get_pressed()`` used by the headless tools.
+
+The game only ever indexes the pressed-key state, so replays, benchmarks
+and the session simulator pass a ``HeldKeys`` holding the keys they want
+down instead.
+"""
+
+
+class HeldKeys:
+    def __init__(self, *keys):
+        self.pressed = set(keys)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+NO_KEYS = HeldKeys()
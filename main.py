@@ -1,9 +1,12 @@
-import base64
-import json
+import argparse
+import math
 import os
 import sys
 import random
-from io import BytesIO
+import time
+from collections import Counter
+
+IMPORT_START = time.perf_counter()  # fallback when the process start is unknown
 
 # Avoid audio initialization errors on systems without sound hardware
 os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -11,84 +14,39 @@ os.environ.setdefault("XDG_RUNTIME_DIR", "/tmp")
 
 import pygame
 
+from assets import AssetPack
+from battle_solver import odds
+from dirty_render import DirtyRenderer
+from encounters import DEFAULT_DISTANCE, EncounterScheduler, EncounterTable
+from gamedata import FIXED_DT, ITEMS, PLAYER_SPEED, RUN_SPEED
+from inventory import Inventory
+from journal import journal
+from overlay import dim
+from profiler import FrameProfiler, StartupProfile, process_start
+from replay import InputRecorder, load_replay
+from rooms import RoomGraph
+from sampling import coin_sampler, item_sampler
+from savegame import apply_snapshot, save_writer, scratch_saves, snapshot
+from spatial import SpatialHash, Trigger
+from telemetry import telemetry
+from text_cache import get_font, render_text
+from transitions import Fade
+from viewstack import ViewStack
+from world import Camera, TileMap, chunks
+
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-PLAYER_SPEED = 4
-RUN_SPEED = 8
-SAVE_FILE = "savegame.json"
-ENCOUNTER_RATE = 0.4  # Chance when stepping in the encounter zone
-ENCOUNTER_DELAY_RANGE = (120, 300)  # frames (2-5 seconds)
-COIN_DROP = {
-    1: (1, 3),
-    2: (2, 4),
-    3: (3, 5),
-}
-
-# Item drop chances per room
-ITEM_DROP = {
-    0: [
-        ("Health Potion", 0.15),
-        ("Elite Scraps", 0.05),
-        ("Good Scraps", 0.10),
-        ("Scraps", 0.20),
-    ],
-    1: [
-        ("Health Potion", 0.15),
-        ("Elite Scraps", 0.05),
-        ("Good Scraps", 0.10),
-        ("Scraps", 0.20),
-        ("Slime", 0.10),
-    ],
-}
-
-# Item definitions used for the shop and inventory
-ITEMS = {
-    "ShortSword": {
-        "type": "weapon",
-        "strength": 1,
-        "price": 5,
-    },
-    "LongSword": {
-        "type": "weapon",
-        "strength": 3,
-        "speed": -1,
-        "price": 10,
-    },
-    "Health Potion": {
-        "type": "potion",
-        "heal": 5,
-        "price": 3,
-        "stack": 5,
-    },
-    "Scraps": {
-        "type": "craft",
-        "price": 1,
-        "stack": 25,
-    },
-    "Good Scraps": {
-        "type": "craft",
-        "price": 2,
-        "stack": 25,
-    },
-    "Elite Scraps": {
-        "type": "craft",
-        "price": 3,
-        "stack": 25,
-    },
-    "Slime": {
-        "type": "craft",
-        "price": 2,
-        "stack": 5,
-    },
-}
-
-# Base64-encoded 32x32 knight sprite with two walking frames
-CHARACTER_FRAMES_B64 = [
-    "iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAAAkklEQVR4nO2VsQ3AIAwESZQ5GIKJXFAxEBWFh6FmpdCHIDBB+iL+0sLm9Jb8xqhUqr/rkDYw8z16Q0TTc08pwG7BAa7VRiJqaswsngN3AA6wvIIVu98EdwAOIF5BznkrwPBixRiby1dK6b53zjW1EEL3H/gKFAAOII5j7/0wjlNKGscKoADTEofRMwestZ8A4A5UY8UZJparjTMAAAAASUVORK5CYII=",
-    "iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAAApUlEQVR4nO2WsQ3EIAxFk9NN5IlcUDEQFYWHofYQ1OyQ1BGnxEaRfnH+HcjA07eF/raFQqF/1+49ICLHUw0zm+/9eAHeFhzgu3qQmac9EXHfA3cADrDcghW7fwnuABzA3YLW2qsAcAfgAKY/u5Qy/f+qOtUR0bSXc759A+5AAMAB3IEkpfQYSGqtEUgCwKylPDDGuKx775c1ER2qahpEtwOeCbfoBGOcIaGV2JaWAAAAAElFTkSuQmCC",
-]
-
-pygame.init()
+MAX_STEPS_PER_FRAME = 8  # catch-up ticks before dropping the backlog
+
+
+def init_pygame():
+    """Start only the subsystems needed for the first frame.
+
+    The display subsystem also brings up events; anything else (such as the
+    mixer) is started by whatever first uses it.
+    """
+    pygame.display.init()
+    pygame.font.init()
 
 
 class Player(pygame.sprite.Sprite):
@@ -104,7 +62,7 @@ class Player(pygame.sprite.Sprite):
         self.level = 1
         self.weapon = None
         self.weapon_bonus = 0
-        self.inventory = [None] * 25  # 5x5 grid
+        self.inventory = Inventory()  # 5x5 grid
         self.coins = 0
         self.max_hp = 10
         self.hp = 10
@@ -117,6 +75,9 @@ class Player(pygame.sprite.Sprite):
         self.moves = ["Slash", "Prepare"]
         self.xp = 0
         self.stat_points = 0
+        # Where the player is, so saves can restore the world around them
+        self.room_id = None
+        self.hardcore = False
 
     def recalc_stats(self):
         self.strength = self.base_strength
@@ -129,39 +90,17 @@ class Player(pygame.sprite.Sprite):
         self.strength += self.weapon_bonus
 
     def add_item(self, name):
-        for i, slot in enumerate(self.inventory):
-            if not slot:
-                self.inventory[i] = {"name": name, "qty": 1}
-                return True
-            if slot["name"] == name and ITEMS.get(name, {}).get("stack"):
-                if slot["qty"] < ITEMS[name]["stack"]:
-                    self.inventory[i]["qty"] += 1
-                    return True
-        return False
+        return self.inventory.add(name)
 
     def remove_item(self, index):
-        item = self.inventory[index]
-        if not item:
-            return None
-        item["qty"] -= 1
-        if item["qty"] <= 0:
-            self.inventory[index] = None
-        return item["name"]
+        return self.inventory.remove_at(index)
 
     def take_item(self, name):
         """Remove one of the given item from inventory."""
-        for i, slot in enumerate(self.inventory):
-            if slot and slot["name"] == name:
-                self.remove_item(i)
-                return True
-        return False
+        return self.inventory.take(name)
 
     def count_item(self, name):
-        total = 0
-        for slot in self.inventory:
-            if slot and slot["name"] == name:
-                total += slot["qty"]
-        return total
+        return self.inventory.count(name)
 
     def handle_input(self, keys):
         speed = RUN_SPEED if keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT] else PLAYER_SPEED
@@ -196,41 +135,29 @@ class Player(pygame.sprite.Sprite):
         menu_x = (SCREEN_WIDTH - menu_width) // 2
         menu_y = (SCREEN_HEIGHT - menu_height) // 2
         pygame.draw.rect(surface, (50, 50, 50), (menu_x, menu_y, menu_width, menu_height))
-        coin_txt = self.font.render(f"Coins: {player.coins}", True, (255, 255, 255))
+        coin_txt = render_text(self.font, f"Coins: {player.coins}", (255, 255, 255))
         surface.blit(coin_txt, (menu_x, menu_y - 40))
         for i, text in enumerate(self.options):
             color = (255, 255, 255) if i == self.selected else (170, 170, 170)
-            render = self.font.render(text, True, color)
+            render = render_text(self.font, text, color)
             surface.blit(render, (menu_x + 20, menu_y + 20 + i * 40))
         if self.message:
-            msg = self.font.render(self.message, True, (255, 255, 0))
+            msg = render_text(self.font, self.message, (255, 255, 0))
             surface.blit(msg, (menu_x, menu_y - 70))
 
 
-def save_game(player):
-    data = {
-        "x": player.rect.x,
-        "y": player.rect.y,
-        "coins": player.coins,
-        "inventory": player.inventory,
-        "weapon": player.weapon,
-        "weapon_bonus": player.weapon_bonus,
-    }
-    with open(SAVE_FILE, "w") as f:
-        json.dump(data, f)
+def save_game(player, slot=1):
+    """Queue the player's state for the background save writer."""
+    data = snapshot(player)
+    save_writer.submit(slot, data)
+    journal.rebase(data)
 
 
-def load_game(player):
-    if os.path.exists(SAVE_FILE):
-        with open(SAVE_FILE, "r") as f:
-            data = json.load(f)
-            player.rect.x = data.get("x", player.rect.x)
-            player.rect.y = data.get("y", player.rect.y)
-            player.coins = data.get("coins", 0)
-            player.inventory = data.get("inventory", [None] * 25)
-            player.weapon = data.get("weapon")
-            player.weapon_bonus = data.get("weapon_bonus", 0)
-            player.recalc_stats()
+def load_game(player, slot=1):
+    data = save_writer.read(slot)
+    if data is not None:
+        apply_snapshot(player, data)
+        journal.rebase(snapshot(player))
 
 
 class TeamView:
@@ -252,27 +179,25 @@ class TeamView:
                     player.weapon = None
                     player.weapon_bonus = 0
                     player.recalc_stats()
+                    journal.record_player(player)
         return None
 
     def draw(self, surface, player):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill((0, 0, 0))
-        surface.blit(overlay, (0, 0))
+        dim(surface)
         if self.page == 0:
-            title = self.font.render(f"{player.name}'s Moves", True, (255, 255, 255))
+            title = render_text(self.font, f"{player.name}'s Moves", (255, 255, 255))
             surface.blit(title, (50, 50))
             lines = [
                 "Slash - deal 4-6 damage",
                 "Prepare - raise defense by 1",
             ]
             for i, txt in enumerate(lines):
-                render = self.font.render(txt, True, (255, 255, 255))
+                render = render_text(self.font, txt, (255, 255, 255))
                 surface.blit(render, (50, 100 + i * 30))
-            hint = self.font.render("Left/Right: Stats  Enter/Esc: Back", True, (200, 200, 200))
+            hint = render_text(self.font, "Left/Right: Stats  Enter/Esc: Back", (200, 200, 200))
             surface.blit(hint, (50, SCREEN_HEIGHT - 50))
         else:
-            title = self.font.render(f"{player.name} Lv.{player.level} Stats", True, (255, 255, 255))
+            title = render_text(self.font, f"{player.name} Lv.{player.level} Stats", (255, 255, 255))
             surface.blit(title, (50, 50))
             stats = [
                 f"HP: {player.hp}/{player.max_hp}",
@@ -301,7 +226,7 @@ class TeamView:
                 item = player.inventory[self.index]
                 if not item:
                     return None
-                name = item["name"]
+                name = item.name
                 itype = ITEMS[name]["type"]
                 if itype == "weapon":
                     if player.weapon:
@@ -310,19 +235,18 @@ class TeamView:
                     player.weapon_bonus = 0
                     player.recalc_stats()
                     player.remove_item(self.index)
+                    journal.record_player(player)
                 elif itype == "potion":
                     if player.hp < player.max_hp:
                         player.hp = min(player.max_hp, player.hp + ITEMS[name]["heal"])
                         player.remove_item(self.index)
+                        journal.record_player(player)
         return None
 
     def draw(self, surface, player):
         if not self.active:
             return
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill((0, 0, 0))
-        surface.blit(overlay, (0, 0))
+        dim(surface)
         def abbrev(name):
             if " " in name:
                 return "".join(w[0] for w in name.split()).upper()
@@ -339,18 +263,18 @@ class TeamView:
             pygame.draw.rect(surface, (80, 80, 80), rect, 2)
             item = player.inventory[idx]
             if item:
-                ab = abbrev(item['name'])
-                txt = f"{ab}x{item['qty']}" if ITEMS[item['name']].get('stack') else ab
-                render = self.font.render(txt, True, (255, 255, 255))
+                ab = abbrev(item.name)
+                txt = f"{ab}x{item.qty}" if ITEMS[item.name].get('stack') else ab
+                render = render_text(self.font, txt, (255, 255, 255))
                 surface.blit(render, (x + 5, y + 15))
             if idx == self.index:
                 pygame.draw.rect(surface, (255, 255, 0), rect, 3)
         selected = player.inventory[self.index]
         if selected:
-            full = f"{selected['name']} x{selected['qty']}" if ITEMS[selected['name']].get('stack') else selected['name']
-            top = self.font.render(full, True, (255, 255, 255))
+            full = f"{selected.name} x{selected.qty}" if ITEMS[selected.name].get('stack') else selected.name
+            top = render_text(self.font, full, (255, 255, 255))
             surface.blit(top, (50, 30))
-        hint = self.font.render("Arrows: move  Enter: use/equip  Esc: back", True, (200, 200, 200))
+        hint = render_text(self.font, "Arrows: move  Enter: use/equip  Esc: back", (200, 200, 200))
         surface.blit(hint, (50, SCREEN_HEIGHT - 40))
 
 
@@ -378,26 +302,25 @@ class ShopView:
 @@ -491,164 +563,413 @@ class ShopView:
                 if player.coins >= price and player.add_item(name):
                     player.coins -= price
+                    journal.record_player(player)
+                    telemetry.emit("purchase", item=name, price=price, coins=player.coins)
         return None
 
     def draw(self, surface, player):
         if not self.active:
             return
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill((0, 0, 0))
-        surface.blit(overlay, (0, 0))
-        title = self.font.render("Shop", True, (255, 255, 255))
+        dim(surface)
+        title = render_text(self.font, "Shop", (255, 255, 255))
         surface.blit(title, (50, 50))
         for i, name in enumerate(self.items):
             price = ITEMS[name]["price"]
             txt = f"{name} - {price}c"
             color = (255, 255, 255) if i == self.index else (170, 170, 170)
-            render = self.font.render(txt, True, color)
+            render = render_text(self.font, txt, color)
             surface.blit(render, (50, 100 + i * 40))
-        wallet = self.font.render(f"Coins: {player.coins}", True, (255, 255, 0))
+        wallet = render_text(self.font, f"Coins: {player.coins}", (255, 255, 0))
         surface.blit(wallet, (50, SCREEN_HEIGHT - 60))
-        hint = self.font.render("Up/Down select  Enter buy  Esc exit", True, (200, 200, 200))
+        hint = render_text(self.font, "Up/Down select  Enter buy  Esc exit", (200, 200, 200))
         surface.blit(hint, (50, SCREEN_HEIGHT - 30))
 
 
@@ -413,9 +336,11 @@ class AnvilView:
         self.slots = [None] * 5
         self.scrap_type = None
         self.weapon_slots = []
+        self.message = ""
 
     def open(self, player):
         self.active = True
+        self.message = ""
         self.tab = 0
         self.index = 0
         self.row = 1
@@ -427,8 +352,11 @@ class AnvilView:
         if not self.active:
             return None
         if event.type == pygame.KEYDOWN:
+            self.message = ""
             if event.key == pygame.K_ESCAPE:
-                self.return_items(player)
+                if not self.return_items(player):
+                    self.message = "Bag full"
+                    return None
                 self.active = False
                 return "close"
             elif event.key in (pygame.K_TAB, pygame.K_LEFT, pygame.K_RIGHT):
@@ -470,86 +398,81 @@ class AnvilView:
     def slot_count(self):
         return 5 if self.tab == 0 else len(self.weapon_slots)
 
+    def held(self):
+        return Counter(item for item in self.slots + self.weapon_slots if item)
+
+    def record(self):
+        """Journal the slots so a crash can put their items back in the bag."""
+        journal.record_anvil(self.held())
+
     def return_items(self, player):
-        for i, item in enumerate(self.slots):
-            if item:
-                player.add_item(item)
-                self.slots[i] = None
-        for i, item in enumerate(self.weapon_slots):
-            if item:
-                player.add_item(item)
-                self.weapon_slots[i] = None
+        """Move everything in the slots back to the bag; False if it won't fit."""
+        if not player.inventory.add_many(self.held()):
+            return False
+        self.slots = [None] * 5
+        self.weapon_slots = [None] * len(self.weapon_slots)
         self.scrap_type = None
+        self.record()
+        return True
 
     def add_from_count(self, player, all=False):
         names = ["Scraps", "Good Scraps", "Elite Scraps"]
         scrap = names[self.index]
-        added = False
-        while True:
-            if not player.take_item(scrap):
-                break
-            for i in range(5):
-                if self.slots[i] is None:
-                    self.slots[i] = scrap
-                    self.scrap_type = scrap if self.scrap_type is None else self.scrap_type
-                    added = True
-                    break
-            else:
-                player.add_item(scrap)
-                break
-            if not all:
-                break
-        if not added:
+        empty = [i for i, item in enumerate(self.slots) if item is None]
+        qty = min(player.count_item(scrap), len(empty) if all else 1)
+        if qty <= 0 or not player.inventory.take_many({scrap: qty}):
             return
+        for i in empty[:qty]:
+            self.slots[i] = scrap
+        if self.scrap_type is None:
+            self.scrap_type = scrap
+        self.record()
 
     def shift_add(self, player):
         if self.tab == 0:
-            if self.scrap_type is None:
-                for name in ("Scraps", "Good Scraps"):
-                    if player.take_item(name):
-                        self.scrap_type = name
-                        for i in range(5):
-                            if self.slots[i] is None:
-                                self.slots[i] = name
-                                return
-                        player.add_item(name)
-                        return
-            else:
-                if player.take_item(self.scrap_type):
-                    for i in range(5):
-                        if self.slots[i] is None:
-                            self.slots[i] = self.scrap_type
-                            return
-                    player.add_item(self.scrap_type)
+            slots = self.slots
+            names = ("Scraps", "Good Scraps") if self.scrap_type is None else (self.scrap_type,)
         else:
-            for scrap in ("Elite Scraps", "Good Scraps", "Scraps"):
-                if player.take_item(scrap):
-                    for i in range(len(self.weapon_slots)):
-                        if self.weapon_slots[i] is None:
-                            self.weapon_slots[i] = scrap
-                            return
-                    player.add_item(scrap)
-                    return
+            slots = self.weapon_slots
+            names = ("Elite Scraps", "Good Scraps", "Scraps")
+        if None not in slots:
+            return
+        for name in names:
+            if player.take_item(name):
+                slots[slots.index(None)] = name
+                if self.tab == 0:
+                    self.scrap_type = name
+                self.record()
+                return
 
     def remove_slot(self, player):
-        if self.tab == 0:
-            if self.slots[self.index]:
-                player.add_item(self.slots[self.index])
-                self.slots[self.index] = None
-                if not any(self.slots):
-                    self.scrap_type = None
-        else:
-            if self.weapon_slots[self.index]:
-                player.add_item(self.weapon_slots[self.index])
-                self.weapon_slots[self.index] = None
+        slots = self.slots if self.tab == 0 else self.weapon_slots
+        item = slots[self.index]
+        if not item:
+            return
+        if not player.add_item(item):
+            self.message = "Bag full"
+            return
+        slots[self.index] = None
+        if self.tab == 0 and not any(self.slots):
+            self.scrap_type = None
+        self.record()
 
     def upgrade(self, player):
         if self.tab == 0:
             if self.scrap_type and all(self.slots):
                 result = "Good Scraps" if self.scrap_type == "Scraps" else "Elite Scraps"
-                player.add_item(result)
+                # The weapon slots must still fit back in the bag afterwards
+                needed = Counter(item for item in self.weapon_slots if item)
+                needed[result] += 1
+                if not player.inventory.can_add(needed):
+                    self.message = "Bag full"
+                    return
+                player.inventory.add_many({result: 1})
+                telemetry.emit("anvil_combine", scraps=self.scrap_type, result=result)
                 self.slots = [None] * 5
                 self.scrap_type = None
+                self.record()
         else:
             bonus = 0
             for scrap in self.weapon_slots:
@@ -562,19 +485,22 @@ class AnvilView:
             if bonus:
                 player.weapon_bonus += bonus
                 player.recalc_stats()
+                journal.record_player(player)
+                telemetry.emit(
+                    "anvil_upgrade", scraps=[s for s in self.weapon_slots if s], bonus=bonus,
+                    weapon_bonus=player.weapon_bonus,
+                )
                 self.weapon_slots = [None] * len(self.weapon_slots)
+                self.record()
 
     def draw(self, surface, player):
         if not self.active:
             return
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill((0, 0, 0))
-        surface.blit(overlay, (0, 0))
+        dim(surface)
         tabs = ["Scraps", "Smithing"]
         for i, name in enumerate(tabs):
             color = (255, 255, 255) if i == self.tab else (170, 170, 170)
-            txt = self.font.render(name, True, color)
+            txt = render_text(self.font, name, color)
             surface.blit(txt, (50 + i * 120, 40))
         if self.tab == 0:
             counts = [
@@ -585,7 +511,7 @@ class AnvilView:
             labels = ["Scraps", "Good", "Elite"]
             for i, lbl in enumerate(labels):
                 clr = (255, 255, 0) if self.row == 0 and self.index == i else (255, 255, 255)
-                txt = self.font.render(f"{lbl}: {counts[i]}", True, clr)
+                txt = render_text(self.font, f"{lbl}: {counts[i]}", clr)
                 surface.blit(txt, (SCREEN_WIDTH - 180, 80 + i * 30))
             for i in range(5):
                 x = SCREEN_WIDTH // 2 - 110 + i * 55
@@ -593,7 +519,7 @@ class AnvilView:
                 rect = pygame.Rect(x, y, 40, 40)
                 pygame.draw.rect(surface, (80, 80, 80), rect, 2)
                 if self.slots[i]:
-                    txt = self.font.render("S", True, (255, 255, 255))
+                    txt = render_text(self.font, "S", (255, 255, 255))
                     rect2 = txt.get_rect(center=rect.center)
                     surface.blit(txt, rect2)
                 if self.row == 1 and i == self.index:
@@ -609,16 +535,19 @@ class AnvilView:
                 pygame.draw.rect(surface, (80, 80, 80), rect, 2)
                 scrap = self.weapon_slots[i]
                 if scrap:
-                    txt = self.font.render("S", True, (255, 255, 255))
+                    txt = render_text(self.font, "S", (255, 255, 255))
                     rect2 = txt.get_rect(center=rect.center)
                     surface.blit(txt, rect2)
                 if i == self.index:
                     pygame.draw.rect(surface, (255, 255, 0), rect, 2)
-            wtxt = self.font.render(f"Weapon: {player.weapon} +{player.weapon_bonus}", True, (255, 255, 255))
+            wtxt = render_text(self.font, f"Weapon: {player.weapon} +{player.weapon_bonus}", (255, 255, 255))
             surface.blit(wtxt, (50, 90))
             hint = "Shift+Enter add  Enter apply  Backspace remove"
-        h = self.font.render(hint, True, (200, 200, 200))
+        h = render_text(self.font, hint, (200, 200, 200))
         surface.blit(h, (50, SCREEN_HEIGHT - 40))
+        if self.message:
+            msg = render_text(self.font, self.message, (255, 80, 80))
+            surface.blit(msg, (50, SCREEN_HEIGHT - 80))
 
 
 class Sign:
@@ -626,13 +555,134 @@ class Sign:
         self.rect = rect
         self.text = text
 
+    def tooltip(self, font):
+        """Return the boxed label surface and where it goes above the sign."""
+        txt = render_text(font, self.text, (255, 255, 255))
+        rect = txt.get_rect(center=(self.rect.centerx, self.rect.top - 10)).inflate(8, 8)
+        label = pygame.Surface(rect.size)
+        label.blit(txt, (4, 4))
+        return label, rect
+
 
 class Room:
-    def __init__(self, color, encounter_rect=None, enemy_level=1, sign=None):
+    def __init__(self, color, encounter_rect=None, enemy_level=1, sign=None, room_id=None,
+                 name="", exits=None, enemies=None, shop=None, anvil=None, drop_table=None,
+                 encounter_distance=DEFAULT_DISTANCE, tiles=None):
         self.color = color
+        self.tiles = tiles
+        # World size; rooms without a tile map are one screen
+        self.size = tiles.size if tiles else (SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.bounds = pygame.Rect((0, 0), self.size)
         self.encounter_rect = encounter_rect
         self.enemy_level = enemy_level
         self.sign = sign
+        self.room_id = room_id
+        self.name = name
+        self.exits = exits or {}
+        self.enemies = enemies or EncounterTable()
+        self.encounter_distance = encounter_distance
+        self.shop = shop
+        self.anvil = anvil
+        self.drop_table = drop_table
+        self.label = None
+        self.layer = None
+        self.triggers = SpatialHash()
+        for kind, rect, target in (
+            ("encounter", encounter_rect, None),
+            ("shop", shop, None),
+            ("anvil", anvil, None),
+            ("sign", sign.rect if sign else None, sign),
+        ):
+            if rect:
+                self.add_trigger(Trigger(kind, rect, target))
+
+    @classmethod
+    def from_data(cls, data):
+        """Build a room from its data file contents (see rooms.py)."""
+        def rect(value):
+            return pygame.Rect(value) if value else None
+
+        sign = data.get("sign")
+        return cls(
+            tuple(data["color"]),
+            rect(data.get("encounter_rect")),
+            enemy_level=data.get("enemy_level", 1),
+            sign=Sign(pygame.Rect(sign["rect"]), sign["text"]) if sign else None,
+            room_id=data["id"],
+            name=data.get("name", data["id"]),
+            exits=data.get("exits"),
+            enemies=EncounterTable.from_data(data.get("enemies")),
+            shop=rect(data.get("shop")),
+            anvil=rect(data.get("anvil")),
+            drop_table=data.get("drop_table"),
+            encounter_distance=tuple(data.get("encounter_distance", DEFAULT_DISTANCE)),
+            tiles=TileMap.from_data(data),
+        )
+
+    def add_trigger(self, trigger):
+        self.triggers.insert(trigger, trigger.rect)
+
+    def touching(self, rect, kind):
+        """First trigger of ``kind`` overlapping ``rect``, or None."""
+        for trigger in self.triggers.query(rect):
+            if trigger.kind == kind:
+                return trigger
+        return None
+
+    def sign_tooltip(self, font):
+        if self.label is None:
+            self.label = self.sign.tooltip(font)
+        return self.label
+
+    def static_layer(self, size):
+        """Return the room's unchanging picture, rendering it on first use."""
+        if self.layer is None or self.layer.get_size() != size:
+            self.layer = pygame.Surface(size)
+            if pygame.display.get_surface():
+                self.layer = self.layer.convert()
+            self.draw_static(self.layer)
+        return self.layer
+
+    def fits(self, size):
+        """True when the whole room is exactly one screen of ``size``."""
+        return self.size == tuple(size)
+
+    def release(self):
+        """Drop cached surfaces when the room is evicted."""
+        self.layer = None
+        self.label = None
+        chunks.drop(self.room_id)
+
+    def draw(self, surface, camera):
+        width, height = surface.get_size()
+        if self.fits((width, height)):
+            surface.blit(self.static_layer((width, height)), (0, 0))
+            return
+        if self.size[0] < width or self.size[1] < height:
+            # The camera sees past the room's edges; clear what chunks won't cover
+            surface.fill(self.color)
+        chunks.draw(surface, self, camera)
+
+    def draw_static(self, surface, area=None):
+        """Draw everything in the room that does not move.
+
+        ``area`` is the world rect that ``surface`` shows; it defaults to the
+        surface's own size at the world origin.
+        """
+        if area is None:
+            area = surface.get_rect()
+        surface.fill(self.color)
+        if self.tiles:
+            self.tiles.draw_area(surface, area)
+        dx, dy = -area.x, -area.y
+        if self.encounter_rect:
+            pygame.draw.rect(surface, (40, 80, 40), self.encounter_rect.move(dx, dy))
+        if self.shop:
+            pygame.draw.rect(surface, (200, 200, 50), self.shop.move(dx, dy))
+        if self.anvil:
+            pygame.draw.rect(surface, (120, 120, 120), self.anvil.move(dx, dy))
+        if self.sign:
+            pygame.draw.rect(surface, (150, 100, 50), self.sign.rect.move(dx, dy))
 
 
 class Battle:
@@ -655,6 +705,12 @@ class Battle:
         self.victory_item = None
         self.orig_speed = player.speed
         self.slow_turns = 0
+        self.result = None
+        self.turns = 0
+        telemetry.emit(
+            "battle_start", enemy=enemy.name, level=enemy.level, enemy_hp=enemy.hp,
+            hp=player.hp, room=player.room_id,
+        )
 
     def handle_event(self, event):
         if event.type != pygame.KEYDOWN:
@@ -688,6 +744,9 @@ class Battle:
                 self.player_move(self.player.moves[self.move_index])
         elif self.state == "message":
             if event.key == pygame.K_RETURN:
+                if self.next_state == "end":
+                    self.finish()
+                    return
                 self.state = self.next_state
                 if self.state == "victory":
                     self.message = f"You won! Gained {self.victory_xp} XP and {self.victory_coins} coins."
@@ -695,15 +754,25 @@ class Battle:
                     self.message = "You were defeated..."
         elif self.state in {"victory", "defeat", "run"}:
             if event.key == pygame.K_RETURN:
+                self.result = self.state
                 if self.state == "victory" and self.victory_xp:
+                    player = self.player
                     msg = f"You won! Gained {self.victory_xp} XP and {self.victory_coins} coins."
-                    self.player.gain_xp(self.victory_xp)
-                    self.player.coins += self.victory_coins
+                    level = player.level
+                    player.gain_xp(self.victory_xp)
+                    player.coins += self.victory_coins
+                    telemetry.emit("xp", amount=self.victory_xp, xp=player.xp, level=player.level)
+                    for gained in range(level + 1, player.level + 1):
+                        telemetry.emit("level_up", level=gained)
+                    telemetry.emit("coins", amount=self.victory_coins, coins=player.coins, source="battle")
                     if self.victory_item:
-                        if self.player.add_item(self.victory_item):
+                        kept = player.add_item(self.victory_item)
+                        if kept:
                             msg += f" Found {self.victory_item}!"
                         else:
                             msg += f" Couldn't carry {self.victory_item}."
+                        telemetry.emit("drop", item=self.victory_item, enemy=self.enemy.name, kept=kept)
+                    journal.record_player(player)
                     self.message = msg
                     self.victory_xp = 0
                     self.victory_coins = 0
@@ -712,13 +781,22 @@ class Battle:
                     self.msg_timer = 60
                     self.next_state = "end"
                     return
-                self.state = "end"
+                self.finish()
+
+    def finish(self):
+        self.state = "end"
+        telemetry.emit(
+            "battle_end", result=self.result, enemy=self.enemy.name, turns=self.turns,
+            hp=self.player.hp, enemy_hp=self.enemy.hp,
+        )
 
     def player_move(self, name):
         if self.slow_turns > 0:
             self.slow_turns -= 1
             if self.slow_turns == 0:
                 self.player.speed = self.orig_speed
+        self.turns += 1
+        dmg = None
         if name == "Prepare":
             self.player.defense += 1
             self.message = "You used Prepare!"
@@ -727,11 +805,11 @@ class Battle:
             dmg = max(1, dmg)
             self.enemy.hp -= dmg
             self.message = f"You used Slash! {self.enemy.name} took {dmg} damage."
+        telemetry.emit("move", by="player", enemy=self.enemy.name, move=name, damage=dmg, enemy_hp=self.enemy.hp)
         if self.enemy.hp <= 0:
             self.next_state = "victory"
             self.victory_xp = self.enemy.xp
-            drop = COIN_DROP.get(self.enemy.level, (self.enemy.level, self.enemy.level + 2))
-            self.victory_coins = random.randint(*drop)
+            self.victory_coins = coin_sampler(self.enemy.level).sample()
             self.victory_item = self.roll_drop()
         else:
             self.next_state = "enemy"
@@ -753,16 +831,13 @@ class Battle:
             dmg = max(1, dmg)
             self.player.hp -= dmg
             self.message = f"{self.enemy.name} used Scratch! You took {dmg} damage."
+        telemetry.emit("move", by="enemy", enemy=self.enemy.name, move=move, damage=dmg, hp=self.player.hp)
         self.next_state = "defeat" if self.player.hp <= 0 else "menu"
         self.state = "message"
         self.msg_timer = 60
 
     def roll_drop(self):
-        drops = ITEM_DROP.get(self.room_idx, [])
-        for name, chance in drops:
-            if random.random() < chance:
-                return name
-        return None
+        return item_sampler(self.room_idx).sample()
 
     def update(self):
         if self.state == "enemy" and self.msg_timer == 0:
@@ -787,210 +862,496 @@ class Battle:
         elif self.state == "moves":
             self.draw_menu(surface, self.player.moves, self.move_index)
         if self.message:
-            msg = self.font.render(self.message, True, (255, 255, 255))
+            msg = render_text(self.font, self.message, (255, 255, 255))
             rect = msg.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
 @@ -714,173 +1035,206 @@ def select_mode(screen, font):
-def main():
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Simple RPG")
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont(None, 32)
-
-    hardcore = select_mode(screen, font)
-
-    player_imgs = []
-    for data in CHARACTER_FRAMES_B64:
-        img_bytes = base64.b64decode(data)
-        player_imgs.append(pygame.image.load(BytesIO(img_bytes)).convert_alpha())
-    player_img = player_imgs[0]
-    enemy_img1 = pygame.Surface((32, 32))
-    enemy_img1.fill((200, 0, 0))
-    enemy_img2 = pygame.Surface((32, 32))
-    enemy_img2.fill((0, 0, 200))
-    enemy_img3 = pygame.Surface((32, 32))
-    enemy_img3.fill((0, 200, 0))
-
-    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, player_imgs)
-    menu = Menu(font)
-    team_view = TeamView(font)
-    bag_view = BagView(font)
-    shop_view = ShopView(font)
-    anvil_view = AnvilView(font)
-    levelup_view = LevelUpView(font)
-    team_active = False
-    bag_active = False
-    shop_active = False
-    anvil_active = False
-
-    shop_rect = pygame.Rect(SCREEN_WIDTH // 2 - 40, SCREEN_HEIGHT - 120, 80, 80)
-    anvil_rect = pygame.Rect(SCREEN_WIDTH // 2 + 60, SCREEN_HEIGHT - 120, 40, 40)
-    rooms = [
-        Room(
-            (60, 120, 60),
-            enemy_level=1,
-            sign=Sign(pygame.Rect(SCREEN_WIDTH // 2 - 20, 40, 40, 30), "Route 1"),
-        ),
-        Room(
-            (80, 100, 140),
-            pygame.Rect(300, 200, 200, 200),
-            enemy_level=1,
-            sign=Sign(pygame.Rect(SCREEN_WIDTH // 2 - 60, 40, 120, 30), "Sewer Entrance"),
-        ),
-        Room(
-            (100, 80, 120),
-            pygame.Rect(250, 150, 300, 200),
-            enemy_level=2,
-        ),
-    ]
-    current_room = 0
-    prev_pos = player.rect.topleft
-    encounter_timer = 0
-    encounter_threshold = random.randint(*ENCOUNTER_DELAY_RANGE)
-    game_state = "map"
-    battle = None
-    running = True
-
-    while running:
-        keys = pygame.key.get_pressed()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE and game_state == "map":
-                if team_active:
-                    team_active = False
-                    menu.show()
-                elif menu.visible:
-                    menu.hide()
-                else:
-                    menu.show()
-            if levelup_view.active:
-                levelup_view.handle_event(event, player)
-                continue
-            if game_state == "map" and not menu.visible and not team_active and not bag_active and not shop_active and not anvil_active:
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and current_room == 0 and player.rect.colliderect(shop_rect):
-                    shop_active = True
-                    shop_view.open()
-                elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and current_room == 0 and player.rect.colliderect(anvil_rect):
-                    anvil_active = True
-                    anvil_view.open(player)
-            if game_state == "map" and menu.visible and not team_active and not bag_active and not shop_active:
-                action = menu.handle_event(event, player)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simple RPG")
+    parser.add_argument(
+        "--dirty-rects",
+        action="store_true",
+        help="only push changed regions of the map screen to the display",
+    )
+    parser.add_argument(
+        "--fps",
+        type=int,
+        default=60,
+        help="render frame cap, 0 to draw on every logic tick (at most 60 fps; game speed is unaffected)",
+    )
+    parser.add_argument("--profile", action="store_true", help="time each phase of every frame (F3 shows the graph)")
+    parser.add_argument("--profile-out", metavar="FILE", help="write rolling frame stats to FILE (.csv or .json)")
+    parser.add_argument("--startup-profile", action="store_true", help="print startup timings up to the first frame")
+    parser.add_argument("--seed", type=int, help="seed for battles, drops and encounters")
+    parser.add_argument("--record", metavar="FILE", help="record input to FILE for replay.py")
+    parser.add_argument("--telemetry", action="store_true", help="stream battle and economy events to telemetry/")
+    return parser.parse_args(argv)
+
+
+class Game:
+    """World state plus the fixed-timestep update and render steps."""
+
+    def __init__(self, screen, font, hardcore, dirty_rects=False, render=True, profiler=None, assets=None):
+        self.screen = screen
+        self.font = font
+        self.render = render
+
+        self.assets = assets or AssetPack.open()
+        player_imgs = self.assets.frames("player")
+        self.player_img = player_imgs[0]
+
+        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, player_imgs)
+        self.player.hardcore = hardcore
+        self.menu = Menu(font)
+        self.team_view = TeamView(font)
+        self.bag_view = BagView(font)
+        self.shop_view = ShopView(font)
+        self.anvil_view = AnvilView(font)
+        self.levelup_view = LevelUpView(font)
+        self.views = ViewStack()
+
+        self.rooms = RoomGraph(Room.from_data)
+        self.room = self.rooms.current
+        self.player.room_id = self.room.room_id
+        self.encounters = EncounterScheduler()
+        self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.camera.follow(self.player.rect, self.room.bounds)
+        self.game_state = "map"
+        self.battle = None
+        self.dirty_renderer = DirtyRenderer(screen) if dirty_rects else None
+        self.running = True
+        self.transition = None
+        self.pending_events = []
+        self.odds_label = (None, None)
+        self.profiler = profiler or FrameProfiler()
+
+    def modal_open(self):
+        return bool(self.views)
+
+    def open_view(self, view, draw=None):
+        """Push ``view`` over a snapshot of the current frame."""
+        if draw is None:
+            draw = lambda surface: view.draw(surface, self.player)
+        self.views.push(view, draw, self.capture_background())
+
+    def close_view(self):
+        self.views.pop()
+
+    def capture_background(self):
+        background = self.screen.copy()
+        if self.views:
+            self.views.draw(background)
+        else:
+            self.draw_world(background)
+        return background
+
+    def refresh_views(self):
+        """Recapture every background, e.g. after loading into another room."""
+        for view, draw in self.views.clear():
+            self.views.push(view, draw, self.capture_background())
+
+    def handle_event(self, event):
+        player = self.player
+        if event.type == pygame.QUIT:
+            self.running = False
+            return
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.profiler.toggle()
+            return
+        if self.transition:
+            # Delivered once the fade finishes
+            self.pending_events.append(event)
+            return
+        view = self.views.top
+        if view is not None:
+            self.view_event(view, event)
+        elif self.game_state == "battle" and self.battle:
+            self.battle.handle_event(event)
+        elif self.game_state == "map" and event.type == pygame.KEYDOWN:
+            room = self.room
+            if event.key == pygame.K_ESCAPE:
+                self.menu.show()
+                self.open_view(self.menu)
+            elif event.key == pygame.K_SPACE and room.touching(player.rect, "shop"):
+                self.shop_view.open()
+                self.open_view(self.shop_view)
+            elif event.key == pygame.K_SPACE and room.touching(player.rect, "anvil"):
+                self.anvil_view.open(player)
+                self.open_view(self.anvil_view)
+
+    def view_event(self, view, event):
+        """Send ``event`` to the top view and act on its result."""
+        player = self.player
+        if view is self.menu:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.menu.hide()
+            else:
+                action = self.menu.handle_event(event, player)
                 if action == "team":
-                    team_active = True
-                elif action == "bag":
-                    bag_active = True
-                    bag_view.open()
-            elif game_state == "map" and team_active:
-                result = team_view.handle_event(event, player)
-                if result == "close":
-                    team_active = False
-                    menu.show()
-            elif game_state == "map" and bag_active:
-                result = bag_view.handle_event(event, player)
-                if result == "close":
-                    bag_active = False
-                    menu.show()
-            elif game_state == "map" and shop_active:
-                result = shop_view.handle_event(event, player)
-                if result == "close":
-                    shop_active = False
-            elif game_state == "map" and anvil_active:
-                result = anvil_view.handle_event(event, player)
-                if result == "close":
-                    anvil_active = False
-            elif game_state == "battle" and battle:
-                battle.handle_event(event)
-
-        if game_state == "map" and not menu.visible and not team_active and not bag_active and not shop_active and not anvil_active:
+                    self.open_view(self.team_view)
+                    return
+                if action == "bag":
+                    self.bag_view.open()
+                    self.open_view(self.bag_view)
+                    return
+            if not self.menu.visible:
+                self.close_view()
+        elif view is self.levelup_view:
+            view.handle_event(event, player)
+            if not view.active:
+                self.close_view()
+                journal.record_player(player)
+        elif view.handle_event(event, player) == "close":
+            self.close_view()
+
+    def update(self, keys):
+        """Advance the game by one FIXED_DT tick."""
+        self.update_map(keys)
+        self.update_battle()
+
+    def update_map(self, keys):
+        if self.transition:
+            self.step_transition()
+            return
+        player = self.player
+        if self.game_state == "map":
+            self.menu.update()
+        if player.room_id != self.room.room_id:
+            # A save from another room was loaded
+            self.enter_room(player.room_id)
+            if self.views:
+                self.refresh_views()
+        if self.game_state == "map" and not self.modal_open():
+            x, y = player.rect.topleft
             player.handle_input(keys)
-            # Room transitions
-            if current_room == 0 and player.rect.top < 0:
-                current_room = 1
-                player.rect.bottom = SCREEN_HEIGHT
-            elif current_room == 1 and player.rect.bottom > SCREEN_HEIGHT:
-                current_room = 0
-                player.rect.top = 0
-            elif current_room == 1 and player.rect.top < 0:
-                current_room = 2
-                player.rect.bottom = SCREEN_HEIGHT
-            elif current_room == 2 and player.rect.bottom > SCREEN_HEIGHT:
-                current_room = 1
-                player.rect.top = 0
+            moved = math.hypot(player.rect.x - x, player.rect.y - y)
             # Encounter check
-            room = rooms[current_room]
-            if room.encounter_rect and room.encounter_rect.colliderect(player.rect):
-                if player.rect.topleft != prev_pos:
-                    encounter_timer += 1
-                    if encounter_timer >= encounter_threshold and random.random() < ENCOUNTER_RATE:
-                        if current_room == 2:
-                            name = "Gremlin"
-                        else:
-                            name = random.choice(["Slime", "Bat"])
-                        lvl = room.enemy_level + (1 if hardcore else 0)
-                        enemy = create_enemy(name, lvl)
-                        if name == "Slime":
-                            enemy_img = enemy_img1
-                        elif name == "Bat":
-                            enemy_img = enemy_img2
-                        else:
-                            enemy_img = enemy_img3
-                        battle = Battle(player, enemy, font, player_img, enemy_img, current_room)
-                        fade(screen, True)
-                        game_state = "battle"
-                        encounter_timer = 0
-                        encounter_threshold = random.randint(*ENCOUNTER_DELAY_RANGE)
-            else:
-                encounter_timer = 0
-                encounter_threshold = random.randint(*ENCOUNTER_DELAY_RANGE)
-            prev_pos = player.rect.topleft
-
-        if game_state == "battle" and battle:
+            room = self.room
+            if room.enemies and room.touching(player.rect, "encounter"):
+                if self.encounters.advance(moved, room.encounter_distance):
+                    self.start_battle(room.enemies.choose(), room.enemy_level)
+                    return
+            self.check_exits()
+            self.camera.follow(player.rect, self.room.bounds)
+
+    def check_exits(self):
+        """Move through the exit on whichever room edge the player crossed."""
+        rect = self.player.rect
+        bounds = self.room.bounds
+        if rect.top < 0:
+            side = "north"
+        elif rect.bottom > bounds.bottom:
+            side = "south"
+        elif rect.left < 0:
+            side = "west"
+        elif rect.right > bounds.right:
+            side = "east"
+        else:
+            return
+        target = self.room.exits.get(side)
+        if not target:
+            rect.clamp_ip(bounds)
+            return
+        self.enter_room(target)
+        bounds = self.room.bounds
+        if side == "north":
+            rect.bottom = bounds.bottom
+        elif side == "south":
+            rect.top = 0
+        elif side == "west":
+            rect.right = bounds.right
+        else:
+            rect.left = 0
+        # Rooms of different sizes can leave the other axis outside
+        rect.clamp_ip(bounds)
+
+    def enter_room(self, room_id):
+        self.room = self.rooms.enter(room_id)
+        self.player.room_id = room_id
+        journal.record_room(self.player)
+        self.camera.follow(self.player.rect, self.room.bounds)
+        if self.render and self.room.fits(self.screen.get_size()):
+            self.room.static_layer(self.screen.get_size())
+
+    def begin_transition(self, midpoint):
+        snapshot = self.screen.copy() if self.render else None
+        self.transition = Fade(midpoint, snapshot)
+
+    def step_transition(self):
+        if self.transition.step():
+            self.transition = None
+            events, self.pending_events = self.pending_events, []
+            for event in events:
+                self.handle_event(event)
+
+    def update_battle(self):
+        if self.transition:
+            return
+        if self.game_state == "battle" and self.battle:
+            battle = self.battle
             battle.update()
             if battle.state == "enemy" and battle.msg_timer == 0:
                 battle.enemy_move()
             if battle.state == "end":
-                fade(screen, False)
-                game_state = "map"
-                battle = None
-                player.hp = max(1, player.hp)  # ensure not zero
-                player.recalc_stats()
-                if player.stat_points > 0:
-                    levelup_view.start()
-
-        if game_state == "map":
-            menu.update()
-            room = rooms[current_room]
-            screen.fill(room.color)
-            if room.encounter_rect:
-                pygame.draw.rect(screen, (40, 80, 40), room.encounter_rect)
-            if current_room == 0:
-                pygame.draw.rect(screen, (200, 200, 50), shop_rect)
-                pygame.draw.rect(screen, (120, 120, 120), anvil_rect)
-            if room.sign:
-                pygame.draw.rect(screen, (150, 100, 50), room.sign.rect)
-                if player.rect.colliderect(room.sign.rect):
-                    txt = font.render(room.sign.text, True, (255, 255, 255))
-                    rect = txt.get_rect(center=(room.sign.rect.centerx, room.sign.rect.top - 10))
-                    pygame.draw.rect(screen, (0, 0, 0), rect.inflate(8, 8))
-                    screen.blit(txt, rect)
-            screen.blit(player.image, player.rect)
-            menu.draw(screen, player)
-            if team_active:
-                team_view.draw(screen, player)
-            if bag_active:
-                bag_view.draw(screen, player)
-            if shop_active:
-                shop_view.draw(screen, player)
-            if anvil_active:
-                anvil_view.draw(screen, player)
-            if levelup_view.active:
-                levelup_view.draw(screen)
-        elif game_state == "battle" and battle:
-            battle.draw(screen)
-
-        pygame.display.flip()
-        clock.tick(60)
+                self.end_battle()
+
+    def start_battle(self, name, level):
+        """Fade out the map; the battle is set up once the screen is black."""
+        self.begin_transition(lambda: self.setup_battle(name, level))
+
+    def setup_battle(self, name, level):
+        lvl = level + (1 if self.player.hardcore else 0)
+        enemy = create_enemy(name, lvl)
+        self.battle = Battle(
+            self.player, enemy, self.font, self.player_img, self.assets.frames(name)[0], self.room.drop_table
+        )
+        self.game_state = "battle"
+
+    def end_battle(self):
+        self.begin_transition(self.leave_battle)
+
+    def leave_battle(self):
+        player = self.player
+        self.game_state = "map"
+        self.battle = None
+        self.odds_label = (None, None)
+        player.hp = max(1, player.hp)  # ensure not zero
+        player.recalc_stats()
+        journal.record_player(player)
+        if player.stat_points > 0:
+            self.levelup_view.start()
+            self.open_view(self.levelup_view, self.levelup_view.draw)
+
+    def draw(self):
+        self.present(self.render_frame())
+
+    def render_frame(self):
+        """Draw the current frame and return the rects to present.
+
+        None means the whole screen changed.
+        """
+        screen = self.screen
+        transition = self.transition
+        if transition and transition.covering:
+            transition.draw_outgoing(screen)
+        elif self.views:
+            # The world under a modal is frozen in the view's background
+            self.views.draw(screen)
+        elif self.game_state == "map":
+            room = self.room
+            sprites = self.world_sprites()
+            if (self.dirty_renderer and not transition and not self.profiler.visible
+                    and room.fits(screen.get_size())):
+                return self.dirty_renderer.draw(room.static_layer(screen.get_size()), sprites)
+            self.draw_world(screen, sprites)
+        elif self.game_state == "battle" and self.battle:
+            self.battle.draw(screen)
+            if self.profiler.visible:
+                self.draw_odds(screen)
+        if transition:
+            transition.draw(screen)
+        self.profiler.draw(screen)
+        if self.dirty_renderer:
+            self.dirty_renderer.invalidate()
+        return None
 
+    def draw_odds(self, surface):
+        """Exact win chance of the current fight, shown with the profiler."""
+        battle = self.battle
+        # The odds only change when a move lands; the label is rendered once
+        # per change and kept out of the shared text cache
+        key = (battle, battle.turns, self.player.hp, battle.enemy.hp)
+        cached, label = self.odds_label
+        if cached != key:
+            win, turns, move = odds(self.player, battle.enemy)
+            text = f"Win {win:.1%}  {turns:.1f} turns left"
+            if move:
+                text += f"  best: {move}"
+            label = get_font(20).render(text, True, (255, 255, 255))
+            self.odds_label = (key, label)
+        surface.blit(label, (10, 10))
+
+    def world_sprites(self):
+        """Moving parts of the map as (surface, screen rect) pairs."""
+        player = self.player
+        room = self.room
+        to_screen = self.camera.to_screen
+        sprites = []
+        if room.touching(player.rect, "sign"):
+            label, rect = room.sign_tooltip(self.font)
+            sprites.append((label, to_screen(rect)))
+        sprites.append((player.image, to_screen(player.rect)))
+        return sprites
+
+    def draw_world(self, surface, sprites=None):
+        self.room.draw(surface, self.camera)
+        for surf, rect in sprites or self.world_sprites():
+            surface.blit(surf, rect)
+
+    def present(self, rects):
+        if rects is None:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+
+    def digest(self):
+        """Summary of the game state used to verify replays."""
+        player = self.player
+        return {
+            "state": self.game_state,
+            "room": self.room.room_id,
+            "pos": list(player.rect.topleft),
+            "hp": player.hp,
+            "max_hp": player.max_hp,
+            "level": player.level,
+            "xp": player.xp,
+            "coins": player.coins,
+            "stats": [player.strength, player.defense, player.speed],
+            "weapon": [player.weapon, player.weapon_bonus],
+            "inventory": player.inventory.to_list(),
+        }
+
+    def run(self, max_fps=60, recorder=None, on_first_frame=None):
+        """Run fixed FIXED_DT updates and render once per loop iteration.
+
+        Simulation time comes from an accumulator so gameplay speed does not
+        depend on the frame rate.  A frame is only drawn after a tick or an
+        event, so there are never more than 60 a second; ``max_fps`` of 0
+        drops the extra cap and the loop sleeps until the next tick is due
+        instead.  When rendering falls behind, several ticks run before the
+        next draw.
+        ``recorder`` receives each frame's input and tick count, and the
+        profiler times each phase of the frame when enabled.
+        ``on_first_frame`` is called once the first frame is on screen.
+        """
+        clock = pygame.time.Clock()
+        accumulator = 0.0
+        prof = self.profiler
+        while self.running:
+            accumulator += clock.tick(max_fps) / 1000
+            prof.begin_frame()
+            keys = pygame.key.get_pressed()
+            events = pygame.event.get()
+            prof.mark("events")
+            for event in events:
+                self.handle_event(event)
+            prof.mark("dispatch")
+            steps = 0
+            while accumulator >= FIXED_DT and self.running:
+                if steps == MAX_STEPS_PER_FRAME:
+                    # Too far behind: drop the backlog instead of spiralling
+                    accumulator = 0.0
+                    break
+                self.update_map(keys)
+                prof.mark("logic")
+                self.update_battle()
+                prof.mark("battle")
+                accumulator -= FIXED_DT
+                steps += 1
+            if recorder:
+                recorder.record(keys, events, steps)
+            if steps or events:
+                rects = self.render_frame()
+                prof.mark("draw")
+                self.present(rects)
+                prof.mark("flip")
+                if on_first_frame:
+                    on_first_frame()
+                    on_first_frame = None
+            prof.end_frame()
+            if not steps and not events:
+                # Nothing to draw before the next tick; don't spin
+                pygame.time.wait(int((FIXED_DT - accumulator) * 1000))
+
+    def replay(self, frames):
+        """Feed recorded (keys, events, steps) frames through the game."""
+        ticks = 0
+        for keys, events, steps in frames:
+            for event in events:
+                self.handle_event(event)
+            for _ in range(steps):
+                self.update(keys)
+            ticks += steps
+            if self.render and (steps or events):
+                self.draw()
+            if not self.running:
+                break
+        return ticks
+
+
+def replay_session(path, render=False):
+    """Replay a recording made with --record and return the game and stats."""
+    header, frames, expected = load_replay(path)
+    init_pygame()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    font = get_font(32)
+    random.seed(header["seed"])
+    game = Game(screen, font, header["hardcore"], render=render)
+    if "start" in header:
+        apply_snapshot(game.player, header["start"])
+        if game.player.room_id != game.room.room_id:
+            game.enter_room(game.player.room_id)
+    # Recorded saves and loads use a copy of the saves the session started with
+    with scratch_saves(header.get("saves")):
+        ticks = game.replay(frames)
+    stats = {
+        "frames": len(frames),
+        "ticks": ticks,
+        "digest": game.digest(),
+        "expected": expected,
+    }
+    return game, stats
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    startup = StartupProfile(process_start(IMPORT_START), enabled=args.startup_profile)
+    startup.mark("imports")
+    init_pygame()
+    startup.mark("display/font init")
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Simple RPG")
+    startup.mark("set_mode")
+    font = get_font(32)
+    startup.mark("fonts")
+
+    recovered = journal.pending()
+    # A leftover journal means the last session crashed; resume it instead
+    hardcore = False if recovered else select_mode(screen, font)
+    startup.mark("mode select", wait=True)
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    random.seed(seed)
+    profiler = FrameProfiler(enabled=args.profile or bool(args.profile_out), export_path=args.profile_out)
+    game = Game(screen, font, hardcore, dirty_rects=args.dirty_rects, profiler=profiler)
+    if recovered and journal.recover(game.player, recovered):
+        hardcore = game.player.hardcore
+    journal.start(game.player, snapshot(game.player))
+    if args.telemetry:
+        telemetry.start()
+    recorder = None
+    if args.record:
+        save = save_writer.read(1)
+        recorder = InputRecorder(args.record, seed, hardcore, snapshot(game.player), {1: save} if save else None)
+    startup.mark("game setup")
+    for name, ms in game.assets.report().items():
+        startup.add(f"assets: {name}", ms)
+
+    def first_frame():
+        startup.mark("first frame")
+        startup.report()
+
+    try:
+        game.run(args.fps, recorder, on_first_frame=first_frame)
+    finally:
+        game.rooms.close()
+        save_writer.close()
+        journal.close(clean=sys.exc_info()[0] is None)
+        telemetry.close()
+        game.assets.close()
+        if recorder:
+            recorder.close(game.digest())
+        if args.profile_out:
+            profiler.export(args.profile_out)
     pygame.quit()
 
 
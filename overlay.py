@@ -0,0 +1,41 @@
+"""Precomputed translucent layers for modal views."""
+
+import pygame
+
+
+class OverlayCache:
+    """Dimming surfaces built once per (size, color, alpha).
+
+    Entries for an old display size are dropped as soon as a layer is
+    requested at a new size, so a resized window rebuilds its overlays.
+    """
+
+    def __init__(self):
+        self.size = None
+        self.layers = {}
+
+    def get(self, size, color=(0, 0, 0), alpha=200):
+        size = tuple(size)
+        if size != self.size:
+            self.layers.clear()
+            self.size = size
+        key = (tuple(color), alpha)
+        layer = self.layers.get(key)
+        if layer is None:
+            layer = pygame.Surface(size)
+            layer.set_alpha(alpha)
+            layer.fill(color)
+            self.layers[key] = layer
+        return layer
+
+    def invalidate(self):
+        self.layers.clear()
+        self.size = None
+
+
+overlays = OverlayCache()
+
+
+def dim(surface, color=(0, 0, 0), alpha=200):
+    """Darken the whole surface with a cached overlay."""
+    surface.blit(overlays.get(surface.get_size(), color, alpha), (0, 0))
@@ -0,0 +1,203 @@
+"""Per-phase frame profiler with an on-screen graph."""
+
+import csv
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+
+from text_cache import get_font
+
+PHASES = ("events", "dispatch", "logic", "battle", "draw", "flip")
+PHASE_COLORS = {
+    "events": (90, 160, 255),
+    "dispatch": (80, 220, 220),
+    "logic": (120, 220, 90),
+    "battle": (230, 200, 60),
+    "draw": (240, 130, 50),
+    "flip": (220, 70, 90),
+}
+FRAME_BUDGET_MS = 1000 / 60
+LABEL_INTERVAL = 0.25  # seconds between refreshes of the overlay's numbers
+
+
+class FrameProfiler:
+    """Times the phases of each frame of the main loop.
+
+    ``begin_frame`` starts the clock and every ``mark(phase)`` adds the time
+    since the previous mark to that phase, so a phase hit several times in
+    one frame (one per update tick) accumulates.  The last ``window`` frames
+    are kept for the overlay and the exported rolling stats; frames over
+    ``spike_ms`` are also kept with their breakdown.
+    """
+
+    def __init__(self, enabled=False, window=300, export_path=None, export_every=300, spike_ms=FRAME_BUDGET_MS * 2):
+        self.enabled = enabled
+        self.visible = False
+        self.history = deque(maxlen=window)
+        self.spikes = deque(maxlen=20)
+        self.export_path = export_path
+        self.export_every = export_every
+        self.spike_ms = spike_ms
+        self.frames = 0
+        self.current = None
+        self.last = 0.0
+        self.labels = []
+        self.labels_at = 0.0
+
+    def toggle(self):
+        self.enabled = True
+        self.visible = not self.visible
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        if self.current is None:
+            return
+        now = time.perf_counter()
+        self.current[phase] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self):
+        if self.current is None:
+            return
+        frame = self.current
+        self.current = None
+        self.history.append(frame)
+        self.frames += 1
+        total = sum(frame.values())
+        if total > self.spike_ms:
+            self.spikes.append({"frame": self.frames, "total_ms": total, **frame})
+        if self.export_path and self.frames % self.export_every == 0:
+            self.export(self.export_path)
+
+    def stats(self):
+        result = {}
+        for phase in PHASES + ("total",):
+            if phase == "total":
+                values = sorted(sum(f.values()) for f in self.history)
+            else:
+                values = sorted(f[phase] for f in self.history)
+            if not values:
+                continue
+            result[phase] = {
+                "mean_ms": sum(values) / len(values),
+                "p95_ms": values[int((len(values) - 1) * 0.95)],
+                "max_ms": values[-1],
+            }
+        return result
+
+    def export(self, path):
+        stats = self.stats()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["phase", "mean_ms", "p95_ms", "max_ms"])
+                for phase, row in stats.items():
+                    writer.writerow([phase, f"{row['mean_ms']:.4f}", f"{row['p95_ms']:.4f}", f"{row['max_ms']:.4f}"])
+        else:
+            data = {
+                "frames": self.frames,
+                "window": len(self.history),
+                "phases": stats,
+                "spikes": list(self.spikes),
+            }
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+
+    def draw(self, surface):
+        """Stacked per-phase bar graph of recent frames in the top right."""
+        if not self.visible:
+            return
+        font = get_font(20)
+        width, height = 300, 120
+        x0 = surface.get_width() - width - 10
+        y0 = 10
+        panel = pygame.Rect(x0, y0, width, height)
+        pygame.draw.rect(surface, (20, 20, 20), panel)
+        scale = height / (FRAME_BUDGET_MS * 2)
+        budget_y = y0 + height - int(FRAME_BUDGET_MS * scale)
+        pygame.draw.line(surface, (200, 200, 200), (x0, budget_y), (x0 + width, budget_y))
+        frames = list(self.history)[-width // 2:]
+        for i, frame in enumerate(frames):
+            y = y0 + height
+            for phase in PHASES:
+                h = min(int(frame[phase] * scale), y - y0)
+                if h > 0:
+                    pygame.draw.rect(surface, PHASE_COLORS[phase], (x0 + i * 2, y - h, 2, h))
+                    y -= h
+        now = time.perf_counter()
+        if now - self.labels_at >= LABEL_INTERVAL:
+            # The numbers change every frame, so they are rendered here a few
+            # times a second rather than through the shared text cache
+            stats = self.stats()
+            self.labels = [
+                font.render(f"{phase} {stats.get(phase, {}).get('mean_ms', 0.0):.2f}ms", True, PHASE_COLORS[phase])
+                for phase in PHASES
+            ]
+            self.labels_at = now
+        for i, txt in enumerate(self.labels):
+            surface.blit(txt, (x0 + (i % 3) * 100, y0 + height + 4 + (i // 3) * 16))
+
+
+def process_start(fallback=None):
+    """``time.perf_counter()`` value at which this process was started.
+
+    The kernel's record of the start time (Linux ``/proc``) includes the
+    interpreter's own start-up and every import.  Where it is not available
+    ``fallback`` is used, or the current time.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            stat = f.read()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        # The command name may contain spaces; starttime is the 20th field
+        # after its closing parenthesis, in clock ticks since boot
+        start_ticks = int(stat.rsplit(")", 1)[1].split()[19])
+        age = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() if fallback is None else fallback
+    return time.perf_counter() - max(age, 0.0)
+
+
+class StartupProfile:
+    """Wall-clock breakdown of startup, from process start to first frame.
+
+    ``wait`` stages (such as the player choosing a mode) are listed but not
+    counted in the total, and neither are sub-stages added with ``add``,
+    whose time is already part of the stage they are listed under.
+    """
+
+    def __init__(self, start, enabled=False):
+        self.enabled = enabled
+        self.last = start
+        self.stages = []
+
+    def mark(self, stage, wait=False):
+        now = time.perf_counter()
+        self.stages.append((stage, (now - self.last) * 1000, wait, False))
+        self.last = now
+
+    def add(self, stage, ms):
+        """Record a sub-stage already timed elsewhere (shown indented)."""
+        self.stages.append((stage, ms, False, True))
+
+    def report(self):
+        if not self.enabled:
+            return
+        total = 0.0
+        print("Startup profile:")
+        for stage, ms, wait, sub in self.stages:
+            if not wait and not sub:
+                total += ms
+            note = " (not counted)" if wait else ""
+            label = "  " + stage if sub else stage
+            print(f"  {label:<32}{ms:>10.2f}ms{note}")
+        print(f"  {'total':<32}{total:>10.2f}ms")
@@ -0,0 +1,137 @@
+"""Input recording and headless replay.
+
+A recording is a gzip-compressed JSON-lines file: a header with the RNG
+seed, game mode, a snapshot of the player as the session started (which
+may be a recovered session rather than a fresh one) and the save slot it
+could load from, one line per rendered frame holding the number of
+update ticks run, the held movement keys as a bitmask and the key events,
+and a final line with a digest of the game state.  Replaying feeds the same
+input to the same ticks, so a session reproduces exactly and can be checked
+against the stored digest.
+
+Run ``python replay.py session.rec`` to replay a recording headless.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import pygame
+
+from keystate import HeldKeys
+
+REPLAY_VERSION = 1
+# Keys the game reads from pygame.key.get_pressed()
+TRACKED_KEYS = [
+    pygame.K_LEFT,
+    pygame.K_RIGHT,
+    pygame.K_UP,
+    pygame.K_DOWN,
+    pygame.K_LSHIFT,
+    pygame.K_RSHIFT,
+]
+RECORDED_EVENTS = {pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP}
+
+
+def mask_keys(mask):
+    """The held-key state stored as ``mask`` by ``key_mask``."""
+    return HeldKeys(*(key for i, key in enumerate(TRACKED_KEYS) if mask & (1 << i)))
+
+
+def key_mask(keys):
+    mask = 0
+    for i, key in enumerate(TRACKED_KEYS):
+        if keys[key]:
+            mask |= 1 << i
+    return mask
+
+
+def encode_event(event):
+    if event.type == pygame.QUIT:
+        return [event.type]
+    return [event.type, event.key, event.mod]
+
+
+def decode_event(data):
+    if data[0] == pygame.QUIT:
+        return pygame.event.Event(pygame.QUIT)
+    return pygame.event.Event(data[0], key=data[1], mod=data[2])
+
+
+class InputRecorder:
+    """Streams the input of a live session to a recording file."""
+
+    def __init__(self, path, seed, hardcore, start=None, saves=None):
+        self.file = gzip.open(path, "wt")
+        self.frames = 0
+        header = {"version": REPLAY_VERSION, "seed": seed, "hardcore": hardcore}
+        if start is not None:
+            header["start"] = start
+        if saves:
+            header["saves"] = saves
+        self.write(header)
+
+    def write(self, data):
+        self.file.write(json.dumps(data, separators=(",", ":")) + "\n")
+
+    def record(self, keys, events, steps):
+        recorded = [encode_event(e) for e in events if e.type in RECORDED_EVENTS]
+        self.write([steps, key_mask(keys), recorded])
+        self.frames += 1
+
+    def close(self, digest):
+        self.write({"end": digest})
+        self.file.close()
+
+
+def load_replay(path):
+    """Return (header, frames, digest) where frames is a list of
+    (HeldKeys, events, steps) tuples."""
+    with gzip.open(path, "rt") as f:
+        lines = [json.loads(line) for line in f]
+    header = lines[0]
+    if header.get("version") != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version {header.get('version')}")
+    digest = None
+    if lines and isinstance(lines[-1], dict) and "end" in lines[-1]:
+        digest = lines.pop()["end"]
+    frames = [
+        (mask_keys(mask), [decode_event(e) for e in events], steps)
+        for steps, mask, events in lines[1:]
+    ]
+    return header, frames, digest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session")
+    parser.add_argument("path", help="recording made with main.py --record")
+    parser.add_argument("--render", action="store_true", help="draw every frame")
+    args = parser.parse_args(argv)
+
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    import main as game_main
+
+    start = time.perf_counter()
+    game, stats = game_main.replay_session(args.path, render=args.render)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Replayed {stats['frames']} frames ({stats['ticks']} ticks) in {elapsed:.2f}s "
+        f"({stats['ticks'] / max(elapsed, 1e-9):.0f} ticks/s)"
+    )
+    if stats["expected"] is None:
+        print("Recording has no final state digest")
+        return 0
+    if stats["digest"] != stats["expected"]:
+        print("State mismatch")
+        print(f"  expected: {stats['expected']}")
+        print(f"  got:      {stats['digest']}")
+        return 1
+    print("Final state matches recording")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Data-driven room graph.
+
+Rooms live in ``data/rooms/<id>.json`` and name their neighbours in an
+``exits`` mapping (north/south/east/west).  Only the current room and its
+neighbours are kept in memory; neighbours are loaded on a background thread
+as soon as a room is entered, so walking through an exit rarely waits on
+disk and the world can grow without adding startup cost.
+"""
+
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+ROOM_DIR = os.path.join(DATA_DIR, "rooms")
+
+
+def start_room(data_dir=DATA_DIR):
+    with open(os.path.join(data_dir, "world.json")) as f:
+        return json.load(f)["start"]
+
+
+def load_room_data(room_id, room_dir=ROOM_DIR):
+    with open(os.path.join(room_dir, f"{room_id}.json")) as f:
+        data = json.load(f)
+    data.setdefault("id", room_id)
+    return data
+
+
+def walk_room_data(start, room_dir=ROOM_DIR):
+    """Yield the data of every room reachable from ``start``."""
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        data = load_room_data(queue.popleft(), room_dir)
+        yield data
+        for room_id in data.get("exits", {}).values():
+            if room_id not in seen:
+                seen.add(room_id)
+                queue.append(room_id)
+
+
+class RoomGraph:
+    """Keeps the current room and its neighbours resident.
+
+    ``build`` turns room data into a room object; it runs on the loader
+    thread for prefetched rooms, so it must not touch the display.  Room
+    objects need a ``release()`` method, called when they are evicted.
+    """
+
+    def __init__(self, build, start=None, room_dir=ROOM_DIR, prefetch=True):
+        self.build = build
+        self.room_dir = room_dir
+        self.rooms = {}
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="room-loader") if prefetch else None
+        self.current = None
+        self.enter(start or start_room(os.path.dirname(room_dir)))
+
+    def load(self, room_id):
+        return self.build(load_room_data(room_id, self.room_dir))
+
+    def get(self, room_id):
+        room = self.rooms.get(room_id)
+        if room is None:
+            future = self.pending.pop(room_id, None)
+            room = future.result() if future else self.load(room_id)
+            self.rooms[room_id] = room
+        return room
+
+    def enter(self, room_id):
+        room = self.get(room_id)
+        self.current = room
+        wanted = {room_id, *room.exits.values()}
+        for other in list(self.rooms):
+            if other not in wanted:
+                self.rooms.pop(other).release()
+        for other in list(self.pending):
+            if other not in wanted:
+                self.pending.pop(other).cancel()
+        for other in room.exits.values():
+            if other in self.rooms or other in self.pending:
+                continue
+            if self.executor:
+                self.pending[other] = self.executor.submit(self.load, other)
+            else:
+                self.rooms[other] = self.load(other)
+        return room
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
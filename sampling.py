@@ -0,0 +1,98 @@
+"""Alias-method samplers for item and coin drops.
+
+An ``AliasSampler`` is built once from a table of probabilities (Vose's
+method) and then draws an outcome in constant time from a single random
+number, however long the table is.  ``item_sampler`` and ``coin_sampler``
+compile the ``ITEM_DROP`` and ``COIN_DROP`` tables on first use and cache
+them, and ``sample_many`` draws whole NumPy arrays for the balance tools.
+
+Item chances are the real probability of each drop: the chance of no drop
+is whatever is left over, rather than each entry being rolled in turn.
+"""
+
+import random
+from functools import lru_cache
+
+from gamedata import COIN_DROP, ITEM_DROP
+
+
+class AliasSampler:
+    def __init__(self, outcomes, probs):
+        if len(outcomes) != len(probs) or not outcomes:
+            raise ValueError("need one probability per outcome")
+        total = sum(probs)
+        if total <= 0:
+            raise ValueError("probabilities must not all be zero")
+        n = len(outcomes)
+        self.outcomes = list(outcomes)
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        scaled = [p * n / total for p in probs]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            big = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = big
+            scaled[big] -= 1.0 - scaled[s]
+            (small if scaled[big] < 1.0 else large).append(big)
+        # Anything left is 1.0 up to rounding and keeps its own outcome
+        self.arrays = None
+
+    @classmethod
+    def from_chances(cls, chances):
+        """``[(outcome, chance), ...]`` plus None for the remaining chance."""
+        outcomes = [outcome for outcome, _ in chances]
+        probs = [chance for _, chance in chances]
+        rest = 1.0 - sum(probs)
+        if rest < -1e-9:
+            raise ValueError("chances add up to more than 1")
+        return cls(outcomes + [None], probs + [max(rest, 0.0)])
+
+    @classmethod
+    def uniform(cls, outcomes):
+        return cls(outcomes, [1.0] * len(outcomes))
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    def sample(self, rng=random):
+        u = rng.random() * len(self.outcomes)
+        i = int(u)
+        if u - i >= self.prob[i]:
+            i = self.alias[i]
+        return self.outcomes[i]
+
+    def sample_many(self, n, rng=None):
+        """Indices into ``outcomes`` for ``n`` draws, as a NumPy array."""
+        import numpy as np  # only the balance tools need NumPy
+
+        if self.arrays is None:
+            self.arrays = (np.array(self.prob), np.array(self.alias))
+        prob, alias = self.arrays
+        rng = rng if rng is not None else np.random.default_rng()
+        u = rng.random(n) * len(self.outcomes)
+        i = u.astype(np.intp)
+        return np.where(u - i < prob[i], i, alias[i])
+
+    def probabilities(self):
+        """Probability of each outcome, recovered from the tables."""
+        n = len(self.outcomes)
+        probs = [0.0] * n
+        for i in range(n):
+            probs[i] += self.prob[i] / n
+            probs[self.alias[i]] += (1.0 - self.prob[i]) / n
+        return dict(zip(self.outcomes, probs))
+
+
+@lru_cache(maxsize=None)
+def item_sampler(drop_table):
+    """Sampler over a room's ``ITEM_DROP`` entry; None means no drop."""
+    return AliasSampler.from_chances(ITEM_DROP.get(drop_table, []))
+
+
+@lru_cache(maxsize=None)
+def coin_sampler(level):
+    low, high = COIN_DROP.get(level, (level, level + 2))
+    return AliasSampler.uniform(list(range(low, high + 1)))
@@ -0,0 +1,173 @@
+"""Save slots written atomically on a background thread.
+
+``snapshot`` copies the player and world state into plain data on the main
+thread, which is cheap.  ``SaveWriter`` serialises snapshots on its own
+thread to ``saves/slot<N>.json``: each one is written to a temp file,
+fsynced and renamed over the old save, so a crash mid-write leaves the
+previous save intact.  Every snapshot carries ``SAVE_VERSION``; saves from
+a newer version of the game are refused rather than half-loaded, while
+older ones (the legacy ``savegame.json`` has no version) load whatever
+fields they have.
+"""
+
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from inventory import Inventory
+
+SAVE_VERSION = 2
+SAVE_DIR = "saves"
+LEGACY_SAVE_FILE = "savegame.json"
+
+_SAVED_FIELDS = (
+    "coins", "weapon", "weapon_bonus", "level", "xp", "hp", "max_hp",
+    "base_strength", "base_defense", "base_speed", "stat_points",
+    "room_id", "hardcore",
+)
+
+
+def player_fields(player):
+    return {field: getattr(player, field) for field in _SAVED_FIELDS}
+
+
+def snapshot(player):
+    data = player_fields(player)
+    data["version"] = SAVE_VERSION
+    data["x"] = player.rect.x
+    data["y"] = player.rect.y
+    data["inventory"] = player.inventory.to_list()
+    data["saved_at"] = time.time()
+    return data
+
+
+def compatible(data):
+    """Whether this version of the game can load the snapshot ``data``."""
+    return isinstance(data, dict) and data.get("version", 1) <= SAVE_VERSION
+
+
+def apply_snapshot(player, data):
+    """Restore a snapshot; older saves only carry some of the fields."""
+    if not compatible(data):
+        raise ValueError(f"unsupported save version {data.get('version')!r}")
+    player.rect.x = data.get("x", player.rect.x)
+    player.rect.y = data.get("y", player.rect.y)
+    for field in _SAVED_FIELDS:
+        if field in data:
+            setattr(player, field, data[field])
+    listener = player.inventory.listener
+    player.inventory = Inventory.from_list(data.get("inventory", []))
+    player.inventory.listener = listener
+    player.recalc_stats()
+
+
+def slot_path(slot, save_dir=SAVE_DIR):
+    return os.path.join(save_dir, f"slot{slot}.json")
+
+
+def write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SaveWriter:
+    """Background thread that writes queued snapshots to their slots."""
+
+    def __init__(self, save_dir=SAVE_DIR, legacy_path=LEGACY_SAVE_FILE):
+        self.save_dir = save_dir
+        self.legacy_path = legacy_path
+        self.queue = queue.Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="save-writer", daemon=True)
+            self.thread.start()
+
+    def submit(self, slot, data):
+        with self.lock:
+            self.pending[slot] = data
+        self.start()
+        self.queue.put(slot)
+
+    def run(self):
+        while True:
+            slot = self.queue.get()
+            if slot is None:
+                self.queue.task_done()
+                return
+            with self.lock:
+                data = self.pending.get(slot)
+            if data is not None:
+                self.write(slot, data)
+                with self.lock:
+                    # A newer snapshot may have been queued meanwhile
+                    if self.pending.get(slot) is data:
+                        del self.pending[slot]
+            self.queue.task_done()
+
+    def write(self, slot, data):
+        os.makedirs(self.save_dir, exist_ok=True)
+        write_atomic(slot_path(slot, self.save_dir), data)
+
+    def read(self, slot):
+        """Return the newest loadable snapshot for ``slot``, or None."""
+        with self.lock:
+            data = self.pending.get(slot)
+        if data is not None:
+            return data
+        paths = [slot_path(slot, self.save_dir)]
+        if slot == 1 and self.legacy_path:
+            paths.append(self.legacy_path)
+        for path in paths:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            return data if compatible(data) else None
+        return None
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+
+save_writer = SaveWriter()
+
+
+@contextmanager
+def scratch_saves(slots=None):
+    """Point ``save_writer`` at a throwaway directory for the duration.
+
+    ``slots`` maps slot numbers to the snapshots the directory starts with.
+    Replays use this so a recorded save or load neither overwrites nor
+    depends on the real save files.
+    """
+    writer = save_writer
+    writer.flush()
+    old = writer.save_dir, writer.legacy_path
+    with tempfile.TemporaryDirectory() as tmp:
+        for slot, data in (slots or {}).items():
+            write_atomic(slot_path(int(slot), tmp), data)
+        writer.save_dir, writer.legacy_path = tmp, None
+        try:
+            yield writer
+        finally:
+            writer.flush()
+            writer.save_dir, writer.legacy_path = old
@@ -0,0 +1,362 @@
+"""Agent-driven full-session simulator for progression and economy tuning.
+
+Each session runs a real ``Game`` headless for a fixed amount of game time,
+with an ``Agent`` supplying key input tick by tick.  The agent walks to the
+best room it can safely hunt in (judged with ``battle_solver``), patrols its
+encounter zone, fights with the solver's best move each turn, drinks
+potions when low, buys weapons and potions from the shop, equips them from
+the bag and spends scraps at the anvil.  Level-ups go through the level-up
+screen like a player pressing Enter.  Nothing is drawn.
+
+Sessions are spread over a process pool and summarised as curves per mode:
+level over time, coins earned per hour, coins held and bag fill, plus the
+Hardcore minus Regular difference.
+
+    python session_sim.py --sessions 500 --minutes 30 --json curves.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import main as game_main
+from battle_solver import odds
+from gamedata import ITEMS
+from keystate import NO_KEYS, HeldKeys
+from rooms import start_room, walk_room_data
+
+TICKS_PER_SECOND = round(1 / game_main.FIXED_DT)
+SAMPLE_SECONDS = 60
+SAFE_ODDS = 0.9  # hunt where every enemy is beaten at least this often
+HEAL_BELOW = 0.5  # drink a potion below this fraction of max HP
+POTION_STOCK = 2
+SCRAPS = ("Scraps", "Good Scraps", "Elite Scraps")
+
+
+def key_event(key, mod=0):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, mod=mod)
+
+
+class Agent:
+    """Scripted player that produces (keys, events) for every tick."""
+
+    def __init__(self, game):
+        self.game = game
+        self.rooms = {data["id"]: data for data in walk_room_data(start_room())}
+        self.script = deque()
+        self.move = "Slash"
+        self.patrol = pygame.K_RIGHT
+
+    def act(self):
+        game = self.game
+        if game.transition:
+            # Input during a fade is buffered and replayed in one burst when
+            # it ends, so wait and decide on the state the fade leads to
+            return NO_KEYS, []
+        if self.script:
+            return NO_KEYS, [self.script.popleft()]
+        view = game.views.top
+        if view is game.levelup_view:
+            return NO_KEYS, [key_event(pygame.K_RETURN)]
+        if view is not None:
+            return NO_KEYS, [key_event(pygame.K_ESCAPE)]
+        if game.game_state == "battle" and game.battle:
+            return NO_KEYS, self.battle_input(game.battle)
+        return self.map_input()
+
+    def battle_input(self, battle):
+        player = self.game.player
+        if battle.state == "menu":
+            self.move = odds(player, battle.enemy)[2] or "Slash"
+            # Losing only leaves the player on 1 HP, so never run
+            target = battle.menu_opts.index("Fight")
+            if battle.menu_index != target:
+                return [key_event(pygame.K_DOWN)]
+            return [key_event(pygame.K_RETURN)]
+        if battle.state == "moves":
+            if battle.move_index != player.moves.index(self.move):
+                return [key_event(pygame.K_DOWN)]
+            return [key_event(pygame.K_RETURN)]
+        if battle.state in ("message", "victory", "defeat", "run"):
+            return [key_event(pygame.K_RETURN)]
+        return []
+
+    def map_input(self):
+        player = self.game.player
+        if player.hp < player.max_hp * HEAL_BELOW and player.count_item("Health Potion"):
+            return self.use_item("Health Potion")
+        weapon = self.best_weapon()
+        if weapon:
+            return self.use_item(weapon)
+        item = self.shopping()
+        if item:
+            return self.visit("shop", [pygame.K_DOWN] * self.game.shop_view.items.index(item) + [pygame.K_RETURN])
+        if player.weapon and sum(player.count_item(s) for s in SCRAPS) >= self.weapon_slots():
+            keys = [pygame.K_TAB] + [(pygame.K_RETURN, pygame.KMOD_LSHIFT)] * self.weapon_slots() + [pygame.K_RETURN]
+            return self.visit("anvil", keys)
+        return self.hunt()
+
+    def weapon_slots(self):
+        return 3 if self.game.player.weapon == "LongSword" else 2
+
+    def best_weapon(self):
+        """A weapon in the bag that beats the equipped one, if any."""
+        player = self.game.player
+        current = ITEMS[player.weapon]["strength"] if player.weapon else 0
+        for name in ("LongSword", "ShortSword"):
+            if player.count_item(name) and ITEMS[name]["strength"] > current and name != player.weapon:
+                return name
+        return None
+
+    def shopping(self):
+        player = self.game.player
+        if not player.inventory.has_free_slot():
+            return None
+        owned = {player.weapon} | {slot.name for slot in player.inventory if slot}
+        if "LongSword" not in owned:
+            if player.coins >= ITEMS["LongSword"]["price"]:
+                return "LongSword"
+            if not owned & {"ShortSword"} and player.coins >= ITEMS["ShortSword"]["price"]:
+                return "ShortSword"
+            return None
+        if player.count_item("Health Potion") < POTION_STOCK and player.coins >= ITEMS["Health Potion"]["price"]:
+            return "Health Potion"
+        return None
+
+    def use_item(self, name):
+        game = self.game
+        index = game.player.inventory.where[name][0]
+        game.bag_view.open()
+        game.open_view(game.bag_view)
+        keys = [pygame.K_RIGHT] * (index % 5) + [pygame.K_DOWN] * (index // 5) + [pygame.K_RETURN, pygame.K_ESCAPE]
+        self.queue(keys)
+        return NO_KEYS, []
+
+    def visit(self, feature, keys):
+        """Walk onto the room's shop or anvil square, open it and press ``keys``."""
+        room_id = next(rid for rid, data in self.rooms.items() if data.get(feature))
+        target = pygame.Rect(self.rooms[room_id][feature])
+        held = self.walk_to(room_id, target.center)
+        if held is not None:
+            return held, []
+        self.queue([pygame.K_SPACE] + keys + [pygame.K_ESCAPE])
+        return NO_KEYS, []
+
+    def queue(self, keys):
+        for key in keys:
+            key, mod = key if isinstance(key, tuple) else (key, 0)
+            self.script.append(key_event(key, mod))
+
+    def hunt(self):
+        room_id = self.hunting_room()
+        area = pygame.Rect(self.rooms[room_id]["encounter_rect"])
+        if self.game.room.room_id != room_id or not area.collidepoint(self.game.player.rect.center):
+            held = self.walk_to(room_id, area.center)
+            if held is not None:
+                return held, []
+        rect = self.game.player.rect
+        if rect.centerx > area.right - 40:
+            self.patrol = pygame.K_LEFT
+        elif rect.centerx < area.left + 40:
+            self.patrol = pygame.K_RIGHT
+        return HeldKeys(self.patrol), []
+
+    def hunting_room(self):
+        """Toughest room whose enemies are all beaten at least SAFE_ODDS
+        at the player's current HP."""
+        player = self.game.player
+        bonus = 1 if player.hardcore else 0
+        best = None
+        for room_id, data in self.rooms.items():
+            enemies = data.get("enemies")
+            if not enemies or not data.get("encounter_rect"):
+                continue
+            level = data.get("enemy_level", 1)
+            if best is None:
+                best = (level, room_id)
+            safe = all(
+                odds(player, game_main.create_enemy(name, level + bonus))[0] >= SAFE_ODDS
+                for name in enemies
+            )
+            if safe and level > best[0]:
+                best = (level, room_id)
+        return best[1]
+
+    def walk_to(self, room_id, point):
+        """Keys that move towards ``point`` in ``room_id``, or None on arrival."""
+        game = self.game
+        rect = game.player.rect
+        if game.room.room_id != room_id:
+            side = self.route(game.room.room_id, room_id)
+            bounds = game.room.bounds
+            point = {
+                "north": (bounds.centerx, -rect.height),
+                "south": (bounds.centerx, bounds.bottom + rect.height),
+                "west": (-rect.width, bounds.centery),
+                "east": (bounds.right + rect.width, bounds.centery),
+            }[side]
+        step = game_main.PLAYER_SPEED
+        keys = []
+        if point[0] - rect.centerx >= step:
+            keys.append(pygame.K_RIGHT)
+        elif rect.centerx - point[0] >= step:
+            keys.append(pygame.K_LEFT)
+        if point[1] - rect.centery >= step:
+            keys.append(pygame.K_DOWN)
+        elif rect.centery - point[1] >= step:
+            keys.append(pygame.K_UP)
+        return HeldKeys(*keys) if keys else None
+
+    def route(self, start, goal):
+        """Exit to take from ``start`` on the shortest path to ``goal``."""
+        queue = deque([(start, None)])
+        seen = {start}
+        while queue:
+            room_id, first = queue.popleft()
+            if room_id == goal:
+                return first
+            for side, target in self.rooms[room_id].get("exits", {}).items():
+                if target not in seen:
+                    seen.add(target)
+                    queue.append((target, first or side))
+        raise ValueError(f"no route from {start} to {goal}")
+
+
+_assets = None
+
+
+def init_worker():
+    global _assets
+    game_main.init_pygame()
+    pygame.display.set_mode((game_main.SCREEN_WIDTH, game_main.SCREEN_HEIGHT))
+    _assets = game_main.AssetPack.open()
+    # Pool workers exit without running atexit hooks, but do run these
+    Finalize(None, close_worker, exitpriority=10)
+
+
+def close_worker():
+    _assets.close()
+
+
+def run_session(job):
+    """Play one session; return its samples and battle counts."""
+    seed, hardcore, minutes = job
+    random.seed(seed)
+    game = game_main.Game(
+        pygame.display.get_surface(), game_main.get_font(32), hardcore, render=False, assets=_assets
+    )
+    agent = Agent(game)
+    player = game.player
+    samples = []
+    earned = 0
+    coins = player.coins
+    counts = {"battles": 0, "defeat": 0, "run": 0}
+    battle = state = None
+
+    def sample(tick):
+        used = sum(1 for slot in player.inventory if slot)
+        samples.append((tick / TICKS_PER_SECOND / 60, player.level, player.coins, earned, used / len(player.inventory)))
+
+    ticks = minutes * 60 * TICKS_PER_SECOND
+    try:
+        for tick in range(ticks):
+            if tick % (SAMPLE_SECONDS * TICKS_PER_SECOND) == 0:
+                sample(tick)
+            keys, events = agent.act()
+            for event in events:
+                game.handle_event(event)
+            game.update(keys)
+            if player.coins > coins:
+                earned += player.coins - coins
+            coins = player.coins
+            if game.battle is not battle:
+                battle = game.battle
+                counts["battles"] += battle is not None
+            if battle and battle.state != state and battle.state in counts:
+                counts[battle.state] += 1
+            state = battle.state if battle else None
+        sample(ticks)
+    finally:
+        game.rooms.close()
+    return {
+        "hardcore": hardcore,
+        "samples": samples,
+        "battles": counts["battles"],
+        "defeats": counts["defeat"],
+        "runs": counts["run"],
+    }
+
+
+def aggregate(results):
+    """Per-minute mean curves for one mode."""
+    curves = {"minute": [], "level": [], "level_p10": [], "level_p90": [], "coins": [], "coins_per_hour": [], "bag_fill": []}
+    for i in range(len(results[0]["samples"])):
+        rows = [r["samples"][i] for r in results]
+        levels = sorted(row[1] for row in rows)
+        minute = rows[0][0]
+        curves["minute"].append(minute)
+        curves["level"].append(statistics.fmean(levels))
+        curves["level_p10"].append(levels[int((len(levels) - 1) * 0.1)])
+        curves["level_p90"].append(levels[int((len(levels) - 1) * 0.9)])
+        curves["coins"].append(statistics.fmean(row[2] for row in rows))
+        earned = statistics.fmean(row[3] for row in rows)
+        curves["coins_per_hour"].append(earned * 60 / minute if minute else 0.0)
+        curves["bag_fill"].append(statistics.fmean(row[4] for row in rows))
+    totals = {key: sum(r[key] for r in results) for key in ("battles", "defeats", "runs")}
+    return {"sessions": len(results), "curves": curves, **totals}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate whole play sessions with a scripted agent")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions per mode")
+    parser.add_argument("--minutes", type=int, default=30, help="game time per session")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="FILE", help="write the curves as JSON")
+    args = parser.parse_args(argv)
+
+    jobs = [
+        (args.seed + i, hardcore, args.minutes)
+        for hardcore in (False, True)
+        for i in range(args.sessions)
+    ]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=init_worker) as pool:
+        results = list(pool.map(run_session, jobs, chunksize=max(1, len(jobs) // (args.workers * 8))))
+    elapsed = time.perf_counter() - start
+    modes = {
+        "regular": aggregate([r for r in results if not r["hardcore"]]),
+        "hardcore": aggregate([r for r in results if r["hardcore"]]),
+    }
+    print(f"{len(jobs)} sessions of {args.minutes} min in {elapsed:.1f}s")
+    for name, mode in modes.items():
+        print(f"{name}: {mode['battles']} battles, {mode['defeats']} defeats, {mode['runs']} runs")
+    regular, hardcore = modes["regular"]["curves"], modes["hardcore"]["curves"]
+    print(f"{'min':>5}{'level':>8}{'hc':>8}{'delta':>8}{'coins/h':>10}{'hc':>8}{'bag':>7}{'hc':>7}")
+    step = max(1, len(regular["minute"]) // 10)
+    for i in sorted(set(range(0, len(regular["minute"]), step)) | {len(regular["minute"]) - 1}):
+        print(
+            f"{regular['minute'][i]:>5.0f}{regular['level'][i]:>8.2f}{hardcore['level'][i]:>8.2f}"
+            f"{hardcore['level'][i] - regular['level'][i]:>+8.2f}"
+            f"{regular['coins_per_hour'][i]:>10.0f}{hardcore['coins_per_hour'][i]:>8.0f}"
+            f"{regular['bag_fill'][i]:>7.0%}{hardcore['bag_fill'][i]:>7.0%}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"minutes": args.minutes, "modes": modes}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
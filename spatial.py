@@ -0,0 +1,99 @@
+"""Uniform-grid spatial hash for overworld entities and trigger zones.
+
+Every entity is filed under each grid cell its rect touches, so a query
+only looks at the entities in the cells under the query rect instead of
+testing every entity in the room.  ``move`` re-files an entity only when
+the span of cells it covers changes, which for a walking entity is a few
+times per cell crossed rather than every tick.
+"""
+
+CELL_SIZE = 128
+
+
+class Trigger:
+    """A named zone in a room, e.g. the shop square or an encounter zone."""
+
+    __slots__ = ("kind", "rect", "target")
+
+    def __init__(self, kind, rect, target=None):
+        self.kind = kind
+        self.rect = rect
+        self.target = target
+
+
+class SpatialHash:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}  # entity -> (rect, cell span)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, entity):
+        return entity in self.entries
+
+    def span(self, rect):
+        """(left, top, right, bottom) cell indices covered by ``rect``."""
+        size = self.cell_size
+        return (
+            rect.left // size,
+            rect.top // size,
+            max(rect.left, rect.right - 1) // size,
+            max(rect.top, rect.bottom - 1) // size,
+        )
+
+    def cell_keys(self, span):
+        left, top, right, bottom = span
+        for cy in range(top, bottom + 1):
+            for cx in range(left, right + 1):
+                yield cx, cy
+
+    def insert(self, entity, rect):
+        if entity in self.entries:
+            self.move(entity, rect)
+            return
+        span = self.span(rect)
+        self.entries[entity] = (rect, span)
+        for key in self.cell_keys(span):
+            # Dicts rather than sets keep query results in insertion order
+            self.cells.setdefault(key, {})[entity] = None
+
+    def remove(self, entity):
+        _, span = self.entries.pop(entity)
+        self.unfile(entity, span)
+
+    def move(self, entity, rect):
+        """Update ``entity``'s rect, re-filing it only if its cells changed."""
+        _, old = self.entries[entity]
+        span = self.span(rect)
+        self.entries[entity] = (rect, span)
+        if span == old:
+            return
+        self.unfile(entity, old)
+        for key in self.cell_keys(span):
+            self.cells.setdefault(key, {})[entity] = None
+
+    def unfile(self, entity, span):
+        for key in self.cell_keys(span):
+            cell = self.cells[key]
+            del cell[entity]
+            if not cell:
+                del self.cells[key]
+
+    def query(self, rect):
+        """Entities whose rects overlap ``rect``."""
+        found = {}
+        cells = self.cells
+        entries = self.entries
+        for key in self.cell_keys(self.span(rect)):
+            cell = cells.get(key)
+            if not cell:
+                continue
+            for entity in cell:
+                if entity not in found and entries[entity][0].colliderect(rect):
+                    found[entity] = None
+        return list(found)
+
+    def rect(self, entity):
+        return self.entries[entity][0]
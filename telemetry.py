@@ -0,0 +1,167 @@
+"""Structured event stream for battles and the economy.
+
+Game code calls ``telemetry.emit(kind, **fields)`` for battle starts and
+ends, every move and its damage, drops, XP and level-ups, coin gains,
+purchases and anvil upgrades.  ``emit`` only stores the event in a
+fixed-size ring buffer; a background thread drains the buffer, serialises
+the events as JSON lines and appends them to gzip-compressed files that
+rotate once they reach ``MAX_FILE_BYTES``.  The frame loop never waits on
+the disk or on a lock.
+
+The buffer has one producer (the game thread) and one consumer (the
+writer).  Each side only advances its own index, so neither needs a lock.
+When the writer falls behind and the buffer is full, new events are
+dropped and counted, and the count is written to the stream as a
+``dropped`` event.
+
+Telemetry is off unless the game is started with ``--telemetry``.
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+
+TELEMETRY_DIR = "telemetry"
+BUFFER_SIZE = 4096  # events
+FLUSH_INTERVAL = 1.0  # seconds
+MAX_FILE_BYTES = 1 << 20  # uncompressed bytes before rotating
+KEEP_FILES = 5
+
+
+class RingBuffer:
+    """Single-producer, single-consumer ring of fixed capacity."""
+
+    def __init__(self, capacity=BUFFER_SIZE):
+        self.capacity = capacity
+        self.items = [None] * capacity
+        self.head = 0  # next write, advanced only by the producer
+        self.tail = 0  # next read, advanced only by the consumer
+        self.dropped = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, item):
+        """Store ``item``; return False and count it if the buffer is full."""
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return False
+        self.items[head % self.capacity] = item
+        self.head = head + 1
+        return True
+
+    def drain(self):
+        """Remove and return everything written so far, oldest first."""
+        tail, head = self.tail, self.head
+        items = self.items
+        out = []
+        for i in range(tail, head):
+            slot = i % self.capacity
+            out.append(items[slot])
+            items[slot] = None
+        self.tail = head
+        return out
+
+
+class Telemetry:
+    def __init__(self, directory=TELEMETRY_DIR, capacity=BUFFER_SIZE,
+                 max_bytes=MAX_FILE_BYTES, keep=KEEP_FILES):
+        self.directory = directory
+        self.path = os.path.join(directory, "events.jsonl.gz")
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.buffer = RingBuffer(capacity)
+        self.reported_drops = 0
+        self.file = None
+        self.written = 0
+        self.wake = threading.Event()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.emit("session_start", pid=os.getpid())
+        self.thread = threading.Thread(target=self.run, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def emit(self, kind, **fields):
+        if self.running:
+            self.buffer.push((time.time(), kind, fields))
+
+    @property
+    def dropped(self):
+        return self.buffer.dropped
+
+    def run(self):
+        while self.running:
+            self.wake.wait(FLUSH_INTERVAL)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        events = self.buffer.drain()
+        lines = [
+            json.dumps(dict(fields, t=kind, ts=round(ts, 3)), separators=(",", ":")) + "\n"
+            for ts, kind, fields in events
+        ]
+        dropped = self.buffer.dropped
+        if dropped != self.reported_drops:
+            self.reported_drops = dropped
+            lines.append(json.dumps({"t": "dropped", "ts": round(time.time(), 3), "total": dropped}) + "\n")
+        if not lines:
+            return
+        data = "".join(lines).encode()
+        if self.file is None:
+            self.open()
+        elif self.written + len(data) > self.max_bytes:
+            self.rotate()
+        self.file.write(data)
+        self.file.flush()
+        self.written += len(data)
+
+    def rotated_path(self, n):
+        return os.path.join(self.directory, f"events.{n}.jsonl.gz")
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # A new session starts a new file rather than appending a gzip member
+        if os.path.exists(self.path):
+            self.shift()
+        self.file = gzip.open(self.path, "wb")
+        self.written = 0
+
+    def shift(self):
+        """Rename events -> events.1 -> events.2 ..., dropping the oldest."""
+        oldest = self.rotated_path(self.keep)
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for n in range(self.keep - 1, 0, -1):
+            if os.path.exists(self.rotated_path(n)):
+                os.replace(self.rotated_path(n), self.rotated_path(n + 1))
+        os.replace(self.path, self.rotated_path(1))
+
+    def rotate(self):
+        self.file.close()
+        self.file = None
+        self.open()
+
+    def close(self):
+        """Stop the writer and flush whatever is still buffered."""
+        if not self.running:
+            return
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+        self.thread = None
+        self.flush()
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+telemetry = Telemetry()
@@ -0,0 +1,62 @@
+"""Shared fonts and cache of rendered text surfaces."""
+
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """Bounded LRU of ``font.render`` results.
+
+    Entries are keyed on (font, text, color, antialias), so a label drawn
+    every frame is only rasterised once while it stays the same.
+    """
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surf = self.entries.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self.entries[key] = surf
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    return text_cache.render(font, text, color, antialias)
+
+
+_fonts = {}
+
+
+def get_font(size, name=None):
+    """Return the shared font for (name, size), creating it once."""
+    font = _fonts.get((name, size))
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.SysFont(name, size)
+        _fonts[(name, size)] = font
+    return font
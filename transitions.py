@@ -0,0 +1,59 @@
+"""Screen transitions advanced by the main loop instead of blocking it.
+
+A ``Fade`` darkens a snapshot of the outgoing screen to black, calls its
+``midpoint`` callback while the screen is black (where the battle is set
+up or torn down), then fades the live incoming scene back in.  It moves one
+step per fixed update tick, so events keep being pumped and replays stay
+deterministic.  Alphas come from a precomputed ramp and the black overlays
+are cached per alpha by ``overlay.dim``.
+"""
+
+from functools import lru_cache
+
+from overlay import dim
+
+FADE_TICKS = 20  # per half, at FIXED_DT ticks
+
+
+@lru_cache(maxsize=None)
+def fade_ramp(ticks):
+    """Overlay alpha for every tick of a full out-and-in fade."""
+    out = [255 * i // ticks for i in range(1, ticks + 1)]
+    return tuple(out + out[-2::-1] + [0])
+
+
+class Fade:
+    def __init__(self, midpoint=None, snapshot=None, ticks=FADE_TICKS):
+        self.midpoint = midpoint
+        self.snapshot = snapshot
+        self.ticks = ticks
+        self.ramp = fade_ramp(ticks)
+        self.tick = 0
+
+    @property
+    def done(self):
+        return self.tick >= len(self.ramp)
+
+    @property
+    def covering(self):
+        """True while the outgoing snapshot should be shown."""
+        return self.tick < self.ticks
+
+    def step(self):
+        """Advance one tick; return True once the fade has finished."""
+        self.tick += 1
+        if self.tick == self.ticks and self.midpoint:
+            self.midpoint()
+            self.midpoint = None
+            self.snapshot = None
+        return self.done
+
+    def draw_outgoing(self, surface):
+        if self.snapshot is not None:
+            surface.blit(self.snapshot, (0, 0))
+
+    def draw(self, surface):
+        """Darken ``surface`` by the current step of the ramp."""
+        alpha = self.ramp[min(self.tick, len(self.ramp) - 1)]
+        if alpha:
+            dim(surface, (0, 0, 0), alpha)
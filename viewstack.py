@@ -0,0 +1,48 @@
+"""Stack of modal views drawn over a frozen copy of the frame beneath.
+
+Only the top view receives input and is redrawn.  When a view is pushed,
+the frame underneath it (the world, plus any views already open) is drawn
+once into ``background`` and reused every frame until the view closes, so
+nothing below the top view is rendered while it is open.
+"""
+
+
+class ViewEntry:
+    __slots__ = ("view", "draw", "background")
+
+    def __init__(self, view, draw, background):
+        self.view = view
+        self.draw = draw
+        self.background = background
+
+
+class ViewStack:
+    def __init__(self):
+        self.entries = []
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def __contains__(self, view):
+        return any(entry.view is view for entry in self.entries)
+
+    @property
+    def top(self):
+        return self.entries[-1].view if self.entries else None
+
+    def push(self, view, draw, background):
+        """Open ``view``; ``draw(surface)`` renders it over ``background``."""
+        self.entries.append(ViewEntry(view, draw, background))
+
+    def pop(self):
+        return self.entries.pop().view if self.entries else None
+
+    def clear(self):
+        """Close every view and return their (view, draw) pairs, bottom first."""
+        entries, self.entries = self.entries, []
+        return [(entry.view, entry.draw) for entry in entries]
+
+    def draw(self, surface):
+        entry = self.entries[-1]
+        surface.blit(entry.background, (0, 0))
+        entry.draw(surface)
@@ -0,0 +1,110 @@
+"""Camera, world coordinates and chunked tile maps.
+
+Room coordinates are world coordinates, and a room can be much larger than
+the screen.  ``Camera`` follows the player and maps world rects to the
+screen.  A room's unchanging picture (its tiles plus encounter zone, shop,
+anvil and sign) is cut into ``CHUNK_SIZE`` squares that are rendered the
+first time they come into view and kept in a shared LRU ``ChunkCache``.
+Only the chunks that intersect the viewport are drawn, so the cost of a
+frame depends on the screen size rather than the size of the map.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+CHUNK_SIZE = 256
+TILE_SIZE = 40
+MAX_CHUNKS = 96
+
+
+class TileMap:
+    """Grid of one-character tiles coloured through a palette."""
+
+    def __init__(self, rows, palette, tile_size=TILE_SIZE):
+        self.rows = rows
+        self.palette = {key: tuple(color) for key, color in palette.items()}
+        self.tile_size = tile_size
+        self.size = (len(rows[0]) * tile_size, len(rows) * tile_size)
+
+    @classmethod
+    def from_data(cls, data):
+        if not data.get("tiles"):
+            return None
+        return cls(data["tiles"], data["palette"], data.get("tile_size", TILE_SIZE))
+
+    def draw_area(self, surface, area):
+        """Draw the tiles under the world rect ``area`` onto ``surface``,
+        whose top left corner is ``area.topleft``."""
+        ts = self.tile_size
+        first_col = max(0, area.left // ts)
+        last_col = min(len(self.rows[0]), -(-area.right // ts))
+        for row in range(max(0, area.top // ts), min(len(self.rows), -(-area.bottom // ts))):
+            line = self.rows[row]
+            y = row * ts - area.top
+            col = first_col
+            while col < last_col:
+                # One fill per run of identical tiles
+                tile = line[col]
+                end = col + 1
+                while end < last_col and line[end] == tile:
+                    end += 1
+                color = self.palette.get(tile)
+                if color:
+                    surface.fill(color, (col * ts - area.left, y, (end - col) * ts, ts))
+                col = end
+
+
+class Camera:
+    """Viewport into the world, kept centred on a target where it can be."""
+
+    def __init__(self, width, height):
+        self.rect = pygame.Rect(0, 0, width, height)
+
+    def follow(self, target, bounds):
+        self.rect.center = target.center
+        self.rect.clamp_ip(bounds)
+
+    def to_screen(self, rect):
+        return rect.move(-self.rect.x, -self.rect.y)
+
+
+class ChunkCache:
+    """LRU of pre-rendered room chunks keyed by (room id, column, row)."""
+
+    def __init__(self, max_chunks=MAX_CHUNKS, chunk_size=CHUNK_SIZE):
+        self.max_chunks = max_chunks
+        self.chunk_size = chunk_size
+        self.chunks = OrderedDict()
+
+    def get(self, room, col, row):
+        key = (room.room_id, col, row)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+        size = self.chunk_size
+        chunk = pygame.Surface((size, size))
+        if pygame.display.get_surface():
+            chunk = chunk.convert()
+        room.draw_static(chunk, pygame.Rect(col * size, row * size, size, size))
+        self.chunks[key] = chunk
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def drop(self, room_id):
+        for key in [key for key in self.chunks if key[0] == room_id]:
+            del self.chunks[key]
+
+    def draw(self, surface, room, camera):
+        """Blit the chunks of ``room`` that the camera can see."""
+        size = self.chunk_size
+        view = camera.rect.clip(room.bounds)
+        for row in range(view.top // size, (view.bottom - 1) // size + 1):
+            for col in range(view.left // size, (view.right - 1) // size + 1):
+                chunk = self.get(room, col, row)
+                surface.blit(chunk, (col * size - camera.rect.x, row * size - camera.rect.y))
+
+
+chunks = ChunkCache()